@@ -0,0 +1,117 @@
+"""hierarchy counters
+
+Revision ID: 3f1d9a7c2b54
+Revises: cc6adec66cf2
+Create Date: 2026-10-17 10:05:27.541093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1d9a7c2b54'
+down_revision: Union[str, None] = 'cc6adec66cf2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tabla padre, columna contador, tabla hija, llave foránea en la hija)
+COUNTERS = [
+    ('department', 'number_of_towns', 'town', 'department_id'),
+    ('town', 'number_of_institutions', 'institution', 'town_id'),
+    ('institution', 'number_of_campuses', 'campus', 'institution_id'),
+    ('campus', 'number_of_coverages', 'coverage', 'campus_id'),
+]
+
+
+def _function_name(child: str) -> str:
+    return f'{child}_maintain_parent_counter'
+
+
+def _create_counter_triggers(parent: str, counter: str, child: str, fk: str) -> None:
+    # Triggers por sentencia con tablas de transición: una inserción o borrado
+    # masivo actualiza cada fila padre una sola vez, con el delta agregado
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION {_function_name(child)}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE {parent} AS p SET {counter} = p.{counter} + d.delta
+                FROM (
+                    SELECT {fk} AS parent_id, count(*) AS delta
+                    FROM new_rows WHERE {fk} IS NOT NULL GROUP BY {fk}
+                ) AS d
+                WHERE p.id = d.parent_id;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE {parent} AS p SET {counter} = p.{counter} - d.delta
+                FROM (
+                    SELECT {fk} AS parent_id, count(*) AS delta
+                    FROM old_rows WHERE {fk} IS NOT NULL GROUP BY {fk}
+                ) AS d
+                WHERE p.id = d.parent_id;
+            ELSIF TG_OP = 'UPDATE' THEN
+                UPDATE {parent} AS p SET {counter} = p.{counter} + d.delta
+                FROM (
+                    SELECT parent_id, sum(delta) AS delta
+                    FROM (
+                        SELECT n.{fk} AS parent_id, 1 AS delta
+                        FROM new_rows AS n JOIN old_rows AS o ON o.id = n.id
+                        WHERE n.{fk} IS DISTINCT FROM o.{fk}
+                        UNION ALL
+                        SELECT o.{fk} AS parent_id, -1 AS delta
+                        FROM new_rows AS n JOIN old_rows AS o ON o.id = n.id
+                        WHERE n.{fk} IS DISTINCT FROM o.{fk}
+                    ) AS moves
+                    WHERE parent_id IS NOT NULL
+                    GROUP BY parent_id
+                    HAVING sum(delta) <> 0
+                ) AS d
+                WHERE p.id = d.parent_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    # Postgres no permite tablas de transición en triggers de varios eventos
+    op.execute(f"""
+        CREATE TRIGGER {child}_counter_insert AFTER INSERT ON {child}
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {_function_name(child)}();
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {child}_counter_delete AFTER DELETE ON {child}
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {_function_name(child)}();
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {child}_counter_update AFTER UPDATE ON {child}
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {_function_name(child)}();
+    """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for parent, counter, child, fk in COUNTERS:
+        op.add_column(parent, sa.Column(counter, sa.Integer(), server_default='0', nullable=False))
+        _create_counter_triggers(parent, counter, child, fk)
+
+        # Valores iniciales a partir de los datos existentes
+        op.execute(f"""
+            UPDATE {parent} AS p SET {counter} = c.total
+            FROM (SELECT {fk} AS parent_id, count(*) AS total FROM {child} GROUP BY {fk}) AS c
+            WHERE p.id = c.parent_id
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for parent, counter, child, fk in reversed(COUNTERS):
+        for event in ('insert', 'delete', 'update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {child}_counter_{event} ON {child}')
+        op.execute(f'DROP FUNCTION IF EXISTS {_function_name(child)}()')
+        op.drop_column(parent, counter)
@@ -0,0 +1,53 @@
+"""beneficiary trigram search
+
+Revision ID: 5c7e1b9f4d26
+Revises: 8e4b2f6d1a93
+Create Date: 2026-10-17 12:20:44.167305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7e1b9f4d26'
+down_revision: Union[str, None] = '8e4b2f6d1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+
+    # unaccent() es STABLE (depende del diccionario) y no puede usarse en un
+    # índice; con el diccionario explícito es seguro declararla IMMUTABLE
+    op.execute("""
+        CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+        $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+    # Nombre completo normalizado (minúsculas, sin tildes) usado por el índice y la búsqueda.
+    # Desde Postgres 17 CREATE INDEX/REINDEX corren con search_path = pg_catalog:
+    # las funciones propias deben ir calificadas con su esquema
+    op.execute("""
+        CREATE OR REPLACE FUNCTION beneficiary_search_name(text, text, text, text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+        $$ SELECT lower(public.immutable_unaccent(concat_ws(' ', $1, $2, $3, $4))) $$
+    """)
+    op.execute("""
+        CREATE INDEX ix_beneficiary_search_name_trgm ON beneficiary
+        USING gin (beneficiary_search_name(first_name, second_name, first_surname, second_surname) gin_trgm_ops)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_beneficiary_search_name_trgm', table_name='beneficiary')
+    op.execute('DROP FUNCTION IF EXISTS beneficiary_search_name(text, text, text, text)')
+    op.execute('DROP FUNCTION IF EXISTS immutable_unaccent(text)')
+    # Las extensiones se dejan instaladas: otras bases/objetos pueden depender de ellas
@@ -0,0 +1,48 @@
+"""coverage fk and unique indexes
+
+Revision ID: 8e4b2f6d1a93
+Revises: 3f1d9a7c2b54
+Create Date: 2026-10-17 10:48:03.902116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4b2f6d1a93'
+down_revision: Union[str, None] = '3f1d9a7c2b54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_coverage_benefit_type_id'), 'coverage', ['benefit_type_id'], unique=False)
+    # La validación anterior tenía carrera, así que puede haber coberturas
+    # duplicadas y el índice único no se podría crear. Se depuran de forma
+    # determinista: por cada (beneficiary_id, benefit_type_id, campus_id) se
+    # conserva la más antigua (created_at, id) y se borran las demás. Se prefiere
+    # borrar a abortar la migración porque las copias representan la misma
+    # asignación; el trigger de borrado ajusta campus.number_of_coverages
+    op.execute("""
+        DELETE FROM coverage AS c
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY beneficiary_id, benefit_type_id, campus_id
+                ORDER BY created_at, id
+            ) AS position
+            FROM coverage
+        ) AS ranked
+        WHERE c.id = ranked.id AND ranked.position > 1
+    """)
+    op.create_index('uq_coverage_beneficiary_benefit_type_campus', 'coverage', ['beneficiary_id', 'benefit_type_id', 'campus_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_coverage_beneficiary_benefit_type_campus', table_name='coverage')
+    op.drop_index(op.f('ix_coverage_benefit_type_id'), table_name='coverage')
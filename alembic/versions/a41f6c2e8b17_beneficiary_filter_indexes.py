@@ -0,0 +1,42 @@
+"""beneficiary filter indexes
+
+Revision ID: a41f6c2e8b17
+Revises: 5c7e1b9f4d26
+Create Date: 2026-10-17 12:58:10.730452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f6c2e8b17'
+down_revision: Union[str, None] = '5c7e1b9f4d26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_beneficiary_grade_id_created_at_id', 'beneficiary', ['grade_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_beneficiary_etnic_group_id_created_at_id', 'beneficiary', ['etnic_group_id', 'created_at', 'id'], unique=False, postgresql_where=sa.text('etnic_group_id IS NOT NULL'))
+    op.create_index('ix_beneficiary_disability_type_id_created_at_id', 'beneficiary', ['disability_type_id', 'created_at', 'id'], unique=False, postgresql_where=sa.text('disability_type_id IS NOT NULL'))
+    op.create_index('ix_beneficiary_victim_conflict_created_at_id', 'beneficiary', ['created_at', 'id'], unique=False, postgresql_where=sa.text('victim_conflict'))
+    op.create_index('ix_beneficiary_retired_created_at_id', 'beneficiary', ['created_at', 'id'], unique=False, postgresql_where=sa.text('retirement_date IS NOT NULL'))
+    # Filtro por municipio: institution.town_id -> campus.institution_id -> coverage.campus_id
+    op.create_index(op.f('ix_institution_town_id'), 'institution', ['town_id'], unique=False)
+    op.create_index(op.f('ix_campus_institution_id'), 'campus', ['institution_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_campus_institution_id'), table_name='campus')
+    op.drop_index(op.f('ix_institution_town_id'), table_name='institution')
+    op.drop_index('ix_beneficiary_retired_created_at_id', table_name='beneficiary')
+    op.drop_index('ix_beneficiary_victim_conflict_created_at_id', table_name='beneficiary')
+    op.drop_index('ix_beneficiary_disability_type_id_created_at_id', table_name='beneficiary')
+    op.drop_index('ix_beneficiary_etnic_group_id_created_at_id', table_name='beneficiary')
+    op.drop_index('ix_beneficiary_grade_id_created_at_id', table_name='beneficiary')
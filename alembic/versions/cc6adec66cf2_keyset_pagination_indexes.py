@@ -0,0 +1,33 @@
+"""keyset pagination indexes
+
+Revision ID: cc6adec66cf2
+Revises: b22fe95f7af6
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cc6adec66cf2'
+down_revision: Union[str, None] = 'b22fe95f7af6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_beneficiary_created_at_id', 'beneficiary', ['created_at', 'id'], unique=False)
+    op.create_index('ix_coverage_created_at_id', 'coverage', ['created_at', 'id'], unique=False)
+    op.create_index('ix_coverage_campus_id_created_at_id', 'coverage', ['campus_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_coverage_campus_id_created_at_id', table_name='coverage')
+    op.drop_index('ix_coverage_created_at_id', table_name='coverage')
+    op.drop_index('ix_beneficiary_created_at_id', table_name='beneficiary')
@@ -0,0 +1,107 @@
+"""skip empty counter updates
+
+Revision ID: d7e3a9c1f052
+Revises: a41f6c2e8b17
+Create Date: 2026-10-17 21:40:12.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e3a9c1f052'
+down_revision: Union[str, None] = 'a41f6c2e8b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tabla padre, columna contador, tabla hija, llave foránea en la hija), como en
+# la migración "hierarchy counters"; los triggers no cambian, solo sus funciones
+COUNTERS = [
+    ('department', 'number_of_towns', 'town', 'department_id'),
+    ('town', 'number_of_institutions', 'institution', 'town_id'),
+    ('institution', 'number_of_campuses', 'campus', 'institution_id'),
+    ('campus', 'number_of_coverages', 'coverage', 'campus_id'),
+]
+
+
+def _function_name(child: str) -> str:
+    return f'{child}_maintain_parent_counter'
+
+
+def _replace_function(parent: str, counter: str, child: str, fk: str, short_circuit: bool) -> None:
+    # Sin cambios en la llave foránea (p. ej. un renombre, o la propia
+    # actualización del contador de la hija) se sale antes de tocar al padre:
+    # si no, cada escritura encadena UPDATE vacíos sede -> institución ->
+    # municipio -> departamento
+    guards = {
+        'INSERT': f"IF NOT EXISTS (SELECT 1 FROM new_rows WHERE {fk} IS NOT NULL) THEN RETURN NULL; END IF;",
+        'DELETE': f"IF NOT EXISTS (SELECT 1 FROM old_rows WHERE {fk} IS NOT NULL) THEN RETURN NULL; END IF;",
+        'UPDATE': f"""IF NOT EXISTS (
+                    SELECT 1 FROM new_rows AS n JOIN old_rows AS o ON o.id = n.id
+                    WHERE n.{fk} IS DISTINCT FROM o.{fk}
+                ) THEN
+                    RETURN NULL;
+                END IF;""",
+    } if short_circuit else {'INSERT': '', 'DELETE': '', 'UPDATE': ''}
+    nonzero = "AND d.delta <> 0" if short_circuit else ""
+
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION {_function_name(child)}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                {guards['INSERT']}
+                UPDATE {parent} AS p SET {counter} = p.{counter} + d.delta
+                FROM (
+                    SELECT {fk} AS parent_id, count(*) AS delta
+                    FROM new_rows WHERE {fk} IS NOT NULL GROUP BY {fk}
+                ) AS d
+                WHERE p.id = d.parent_id;
+            ELSIF TG_OP = 'DELETE' THEN
+                {guards['DELETE']}
+                UPDATE {parent} AS p SET {counter} = p.{counter} - d.delta
+                FROM (
+                    SELECT {fk} AS parent_id, count(*) AS delta
+                    FROM old_rows WHERE {fk} IS NOT NULL GROUP BY {fk}
+                ) AS d
+                WHERE p.id = d.parent_id;
+            ELSIF TG_OP = 'UPDATE' THEN
+                {guards['UPDATE']}
+                UPDATE {parent} AS p SET {counter} = p.{counter} + d.delta
+                FROM (
+                    SELECT parent_id, sum(delta) AS delta
+                    FROM (
+                        SELECT n.{fk} AS parent_id, 1 AS delta
+                        FROM new_rows AS n JOIN old_rows AS o ON o.id = n.id
+                        WHERE n.{fk} IS DISTINCT FROM o.{fk}
+                        UNION ALL
+                        SELECT o.{fk} AS parent_id, -1 AS delta
+                        FROM new_rows AS n JOIN old_rows AS o ON o.id = n.id
+                        WHERE n.{fk} IS DISTINCT FROM o.{fk}
+                    ) AS moves
+                    WHERE parent_id IS NOT NULL
+                    GROUP BY parent_id
+                    HAVING sum(delta) <> 0
+                ) AS d
+                WHERE p.id = d.parent_id {nonzero};
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for parent, counter, child, fk in COUNTERS:
+        _replace_function(parent, counter, child, fk, short_circuit=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for parent, counter, child, fk in COUNTERS:
+        _replace_function(parent, counter, child, fk, short_circuit=False)
@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from statistics import median, quantiles
+
+from sqlmodel import delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import async_engine
+from models.department import Department
+from schemas.departments import DepartmentCreate, DepartmentUpdate
+from services.department import DepartmentService
+from utils import REQUEST_QUERY_STATS, RequestQueryStats
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Prefijo de los registros creados, para poder borrarlos al terminar
+NAME_PREFIX = "bench-"
+
+
+def _summary(label: str, timings: list[float], statements: int) -> str:
+    p95 = quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+    return (
+        f"{label}: {len(timings)} ops, p50 {median(timings) * 1000:.2f} ms, "
+        f"p95 {p95 * 1000:.2f} ms, {statements / len(timings):.1f} sentencias/op"
+    )
+
+
+async def _measure(operation) -> tuple[object, float, int]:
+    # Reutiliza las estadísticas por petición para contar sentencias SQL
+    stats = RequestQueryStats(method="BENCH", path="writes")
+    token = REQUEST_QUERY_STATS.set(stats)
+    try:
+        started = time.perf_counter()
+        result = await operation()
+        return result, time.perf_counter() - started, stats.count
+    finally:
+        REQUEST_QUERY_STATS.reset(token)
+
+
+async def benchmark_writes(iterations: int) -> None:
+    """
+    Mide la ruta de escritura (create, update y create duplicado) de
+    DepartmentService contra la base configurada. Los departamentos creados se
+    borran al final; usar una base de desarrollo.
+    """
+    create_timings, update_timings, duplicate_timings = [], [], []
+    create_statements = update_statements = duplicate_statements = 0
+
+    async def in_session(operation):
+        # Una sesión por operación, como una petición: sin mapa de identidad compartido
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return await operation(DepartmentService(session))
+
+    try:
+        for _ in range(iterations):
+            suffix = uuid.uuid4().hex[:8]
+            department_in = DepartmentCreate(name=f"{NAME_PREFIX}{suffix}", dane_code=f"bench{suffix}")
+
+            department, elapsed, count = await _measure(lambda: in_session(lambda service: service.create_department(department_in)))
+            create_timings.append(elapsed)
+            create_statements += count
+
+            update_in = DepartmentUpdate(name=f"{NAME_PREFIX}{suffix}-u")
+            _, elapsed, count = await _measure(lambda: in_session(lambda service: service.update_department(department["id"], update_in)))
+            update_timings.append(elapsed)
+            update_statements += count
+
+            async def create_duplicate(service):
+                try:
+                    await service.create_department(department_in.model_copy(update={"name": f"{NAME_PREFIX}{suffix}-d"}))
+                except ValueError:
+                    pass
+
+            _, elapsed, count = await _measure(lambda: in_session(create_duplicate))
+            duplicate_timings.append(elapsed)
+            duplicate_statements += count
+
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            await session.exec(delete(Department).where(Department.name.startswith(NAME_PREFIX)))
+            await session.commit()
+    finally:
+        await async_engine.dispose()
+
+    logger.info(_summary("create", create_timings, create_statements))
+    logger.info(_summary("update", update_timings, update_statements))
+    logger.info(_summary("create duplicado (400)", duplicate_timings, duplicate_statements))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la ruta de escritura (create/update)")
+    parser.add_argument("-n", "--iterations", type=int, default=200, help="Operaciones por tipo")
+    args = parser.parse_args()
+    asyncio.run(benchmark_writes(args.iterations))
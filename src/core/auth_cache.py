@@ -0,0 +1,93 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from utils import AUTH_CACHE_EVICTIONS, AUTH_CACHE_HITS, AUTH_CACHE_MISSES
+
+CacheKey = Tuple[str, str, str, str]
+
+
+def hash_token(token: str) -> str:
+    # Nunca guardamos el token en claro como llave del cache
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class AuthorizationCache:
+    """
+    Cache en memoria (TTL + LRU) de decisiones de autorización positivas.
+
+    La llave es (hash del token, permiso, método, plantilla de la ruta), de modo
+    que las decisiones para `GET /beneficiaries/{beneficiary_id}` se reutilizan
+    sin importar el id concreto de la petición.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, stale_grace_seconds: float = 0.0):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Tiempo extra (tras el TTL) durante el cual una decisión puede servirse
+        # con `get_stale` si el servicio de auth no está disponible
+        self.stale_grace_seconds = stale_grace_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, dict]]" = OrderedDict()
+
+    @staticmethod
+    def build_key(token: str, permission: str, method: str, endpoint: str) -> CacheKey:
+        return (hash_token(token), permission, method.upper(), endpoint)
+
+    def get(self, key: CacheKey) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            AUTH_CACHE_MISSES.labels(permission=key[1]).inc()
+            return None
+
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            if expires_at + self.stale_grace_seconds <= now:
+                del self._entries[key]
+                AUTH_CACHE_EVICTIONS.labels(reason="expired").inc()
+            AUTH_CACHE_MISSES.labels(permission=key[1]).inc()
+            return None
+
+        self._entries.move_to_end(key)
+        AUTH_CACHE_HITS.labels(permission=key[1]).inc()
+        return value
+
+    def get_stale(self, key: CacheKey) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at + self.stale_grace_seconds <= time.monotonic():
+            return None
+        return value
+
+    def set(self, key: CacheKey, value: dict) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            AUTH_CACHE_EVICTIONS.labels(reason="capacity").inc()
+
+    def evict(self, key: CacheKey) -> None:
+        if self._entries.pop(key, None) is not None:
+            AUTH_CACHE_EVICTIONS.labels(reason="forbidden").inc()
+
+    def evict_token(self, token_hash: str) -> None:
+        # Un 401 invalida todas las decisiones asociadas al token
+        stale_keys = [key for key in self._entries if key[0] == token_hash]
+        for key in stale_keys:
+            del self._entries[key]
+        if stale_keys:
+            AUTH_CACHE_EVICTIONS.labels(reason="unauthorized").inc(len(stale_keys))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,111 @@
+import logging
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Deque, Tuple
+
+from utils import AUTH_CIRCUIT_STATE
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(IntEnum):
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+
+class CircuitOpenError(Exception):
+    """La llamada no se realizó porque el circuito está abierto."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por tasa de error sobre una ventana deslizante de tiempo.
+
+    - CLOSED: todas las llamadas pasan; si en la ventana hay al menos
+      `minimum_calls` y la tasa de error supera `failure_rate_threshold`, se abre.
+    - OPEN: las llamadas fallan de inmediato durante `open_seconds`.
+    - HALF_OPEN: se permiten hasta `half_open_max_calls` llamadas de prueba; un
+      éxito cierra el circuito y un fallo lo vuelve a abrir.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float,
+        minimum_calls: int,
+        window_seconds: float,
+        open_seconds: float,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._calls: Deque[Tuple[float, bool]] = deque()
+        self._opened_at: float = 0.0
+        self._half_open_in_flight: int = 0
+        self._set_state(CircuitState.CLOSED)
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._set_state(CircuitState.HALF_OPEN)
+        return self._state
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+            self._half_open_in_flight += 1
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._state == CircuitState.OPEN:
+            # Llamada iniciada antes de abrir el circuito: no cuenta
+            return
+        if self._state == CircuitState.HALF_OPEN:
+            logger.info(f"Circuit '{self.name}' probe succeeded, closing circuit")
+            self._calls.clear()
+            self._set_state(CircuitState.CLOSED)
+            return
+        self._record(True)
+
+    def record_failure(self) -> None:
+        if self._state == CircuitState.OPEN:
+            # Una llamada lenta iniciada antes de abrir el circuito no debe
+            # reabrirlo y correr el plazo de apertura
+            return
+        if self._state == CircuitState.HALF_OPEN:
+            logger.warning(f"Circuit '{self.name}' probe failed, reopening circuit")
+            self._open()
+            return
+        self._record(False)
+
+        failures = sum(1 for _, ok in self._calls if not ok)
+        total = len(self._calls)
+        if total >= self.minimum_calls and failures / total >= self.failure_rate_threshold:
+            logger.error(f"Circuit '{self.name}' opened: {failures}/{total} failed calls in the last {self.window_seconds}s")
+            self._open()
+
+    def _record(self, ok: bool) -> None:
+        now = time.monotonic()
+        self._calls.append((now, ok))
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+        self._set_state(CircuitState.OPEN)
+
+    def _set_state(self, state: CircuitState) -> None:
+        self._state = state
+        self._half_open_in_flight = 0
+        AUTH_CIRCUIT_STATE.labels(circuit=self.name).set(int(state))
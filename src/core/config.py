@@ -24,6 +24,53 @@ class Settings(BaseSettings):
         data = values.data
         return f"postgresql+psycopg2://{data.get('POSTGRES_USER')}:{data.get('POSTGRES_PASSWORD')}@{data.get('DB_HOST')}:{data.get('DB_HOST_PORT')}/{data.get('POSTGRES_DB')}"
 
+    # Réplica de solo lectura (opcional). Las rutas GET la usan salvo que el
+    # cliente haya escrito hace menos de DB_READ_YOUR_WRITES_SECONDS.
+    DATABASE_REPLICA_URL: str | None = None
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+    DB_REPLICA_RETRY_SECONDS: float = 30.0
+
+    # Pool de conexiones (por worker) y log de SQL
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False
+
+    # Presupuesto de sentencias SQL por petición y umbral de repeticiones (N+1)
+    DB_QUERY_BUDGET: int = 20
+    DB_QUERY_REPEAT_THRESHOLD: int = 5
+    DB_SERVER_TIMING_ENABLED: bool = True
+
+    # Log de consultas lentas (umbral en ms, 0 lo desactiva)
+    DB_SLOW_QUERY_THRESHOLD_MS: float = 500.0
+    DB_SLOW_QUERY_LOG_SIZE: int = 200
+    DB_SLOW_QUERY_EXPLAIN: bool = False
+    # EXPLAIN ANALYZE vuelve a ejecutar la consulta: solo para diagnóstico puntual
+    DB_SLOW_QUERY_EXPLAIN_ANALYZE: bool = False
+
+    # Cargas masivas: filas por lote (COPY / INSERT) y máximo de filas por petición
+    DB_BULK_BATCH_SIZE: int = 1000
+    DB_BULK_MAX_ROWS: int = 50000
+
+    # Importación de archivos CSV/XLSX: filas por bloque de validación/escritura,
+    # errores guardados por trabajo y trabajos retenidos en memoria
+    IMPORT_CHUNK_SIZE: int = 5000
+    IMPORT_MAX_ERRORS: int = 1000
+    IMPORT_MAX_JOBS: int = 100
+
+    # Filas por record batch / row group en la exportación Parquet de coberturas
+    EXPORT_BATCH_SIZE: int = 50000
+
+    # Búsqueda de beneficiarios por nombre (pg_trgm): presupuesto de latencia y
+    # umbral de word_similarity para el operador <%
+    BENEFICIARY_SEARCH_TIMEOUT_MS: int = 300
+    BENEFICIARY_SEARCH_SIMILARITY_THRESHOLD: float = 0.3
+
+    # Cache en memoria de las tablas paramétricas (nombre -> id)
+    PARAMETRIC_CACHE_TTL_SECONDS: float = 300.0
+
     API_PREFIX_STR: str = "/api/v1"
     MODULE_IDENTIFIER: str = "nutripae-cobertura"
 
@@ -40,6 +87,44 @@ class Settings(BaseSettings):
         data = values.data
         return f"http://{data.get('NUTRIPAE_AUTH_HOST')}:{data.get('NUTRIPAE_AUTH_PORT')}{data.get('NUTRIPAE_AUTH_PREFIX_STR')}"
 
+    # Pool HTTP compartido hacia el servicio de auth (tiempos en segundos)
+    AUTH_HTTP_MAX_CONNECTIONS: int = 100
+    AUTH_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    AUTH_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    AUTH_HTTP2_ENABLED: bool = False
+    AUTH_HTTP_CONNECT_TIMEOUT: float = 2.0
+    AUTH_HTTP_READ_TIMEOUT: float = 5.0
+    AUTH_HTTP_WRITE_TIMEOUT: float = 5.0
+    AUTH_HTTP_POOL_TIMEOUT: float = 2.0
+
+    # Verificación local de JWT (opcional). Si el token no trae permisos se
+    # consulta al servicio de auth como siempre.
+    AUTH_JWT_OFFLINE_ENABLED: bool = False
+    AUTH_JWKS_PATH: str = "/.well-known/jwks.json"
+    AUTH_JWKS_CACHE_TTL_SECONDS: float = 300.0
+    # Un `kid` desconocido fuerza a recargar el JWKS como mucho una vez por
+    # intervalo; si la descarga falla no se reintenta durante el backoff
+    AUTH_JWKS_MIN_REFRESH_SECONDS: float = 30.0
+    AUTH_JWKS_FAILURE_BACKOFF_SECONDS: float = 10.0
+    AUTH_JWT_PUBLIC_KEY: str | None = None
+    AUTH_JWT_ALGORITHMS: list[str] = ["RS256"]
+    AUTH_JWT_AUDIENCE: str | None = None
+    AUTH_JWT_ISSUER: str | None = None
+    AUTH_JWT_PERMISSIONS_CLAIM: str = "permissions"
+
+    # Cache de decisiones de autorización (TTL en segundos, 0 lo desactiva)
+    AUTH_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    # Ventana extra para servir decisiones vencidas mientras el circuito está abierto
+    AUTH_CACHE_STALE_GRACE_SECONDS: float = 0.0
+
+    # Circuit breaker hacia el servicio de auth
+    AUTH_CIRCUIT_FAILURE_RATE: float = 0.5
+    AUTH_CIRCUIT_MIN_CALLS: int = 10
+    AUTH_CIRCUIT_WINDOW_SECONDS: float = 30.0
+    AUTH_CIRCUIT_OPEN_SECONDS: float = 15.0
+    AUTH_CIRCUIT_HALF_OPEN_MAX_CALLS: int = 1
+
     OTLP_GRPC_ENDPOINT: str
 
     model_config = SettingsConfigDict(
@@ -0,0 +1,25 @@
+from typing import Any, Dict, NoReturn, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+
+def violated_constraint(error: IntegrityError) -> Optional[str]:
+    """Nombre de la restricción (índice único, llave foránea...) que falló."""
+    orig = error.orig
+    # asyncpg: la excepción original del driver queda en __cause__
+    name = getattr(getattr(orig, "__cause__", None), "constraint_name", None)
+    if name is None:
+        # psycopg2 (motor síncrono): viene en el diagnóstico
+        name = getattr(getattr(orig, "diag", None), "constraint_name", None)
+    return name
+
+
+def raise_for_constraint(error: IntegrityError, messages: Dict[str, str], values: Dict[str, Any]) -> NoReturn:
+    """
+    Convierte la violación de una restricción conocida en ValueError con el
+    mensaje de `messages` (formateado con `values`); cualquier otra se re-lanza.
+    """
+    message = messages.get(violated_constraint(error))
+    if message is None:
+        raise error
+    raise ValueError(message.format(**values)) from None
@@ -4,19 +4,185 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import List
 import logging
 
+from core.auth_cache import AuthorizationCache, CacheKey
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError
 from core.config import settings
+from core.http_client import get_auth_client
+from core.jwt_verifier import JWTVerifier
+from core.single_flight import SingleFlight
+from utils import AUTH_CIRCUIT_REJECTIONS
 
 # Configurar logging para debugging
 logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
+# Cache compartido por todas las dependencias de permisos del proceso
+auth_cache = AuthorizationCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    stale_grace_seconds=settings.AUTH_CACHE_STALE_GRACE_SECONDS,
+)
+
+# Falla rápido cuando el servicio de auth está caído o degradado
+auth_breaker = CircuitBreaker(
+    name="nutripae-auth",
+    failure_rate_threshold=settings.AUTH_CIRCUIT_FAILURE_RATE,
+    minimum_calls=settings.AUTH_CIRCUIT_MIN_CALLS,
+    window_seconds=settings.AUTH_CIRCUIT_WINDOW_SECONDS,
+    open_seconds=settings.AUTH_CIRCUIT_OPEN_SECONDS,
+    half_open_max_calls=settings.AUTH_CIRCUIT_HALF_OPEN_MAX_CALLS,
+)
+
+# Verificaciones en vuelo, compartidas entre peticiones con la misma llave
+auth_single_flight = SingleFlight()
+
+# Verificación local de JWT, solo si está habilitada
+jwt_verifier = JWTVerifier() if settings.AUTH_JWT_OFFLINE_ENABLED else None
+
+# Endpoint normalizado (ej: "nutripae-cobertura/beneficiaries/{beneficiary_id}")
+# por plantilla de ruta, resuelto una vez al arrancar la aplicación
+_endpoint_templates: dict[str, str] = {}
+
+def _normalize_endpoint(path: str) -> str:
+    if path.startswith(settings.API_PREFIX_STR):
+        path = path[len(settings.API_PREFIX_STR):]
+    return f"{settings.MODULE_IDENTIFIER}{path}"
+
+def register_route_templates(routes) -> None:
+    """
+    Precalcula el endpoint que se envía al servicio de auth para cada ruta, de modo
+    que las decisiones se compartan entre todos los ids de una misma plantilla.
+    """
+    for route in routes:
+        path = getattr(route, "path", None)
+        if path:
+            _endpoint_templates[path] = _normalize_endpoint(path)
+
+def _route_template(request: Request) -> str:
+    route = request.scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        # Sin ruta resuelta: se usa el path concreto como antes
+        return _normalize_endpoint(request.url.path)
+
+    template = _endpoint_templates.get(path)
+    if template is None:
+        template = _endpoint_templates[path] = _normalize_endpoint(path)
+    return template
+
+async def _check_remote_authorization(
+    token: str,
+    permission: str,
+    endpoint: str,
+    method: str,
+    cache_key: CacheKey,
+) -> dict:
+    """
+    Consulta al servicio de auth y traduce su respuesta a HTTPException o al
+    usuario actual. Las llamadas concurrentes idénticas comparten una sola ejecución.
+    """
+    # Preparar el payload para el servicio auth
+    auth_payload = {
+        "endpoint": endpoint,
+        "method": method,
+        "required_permissions": [permission]
+    }
+
+    logger.info(f"Checking authorization for user with permission '{permission}' on endpoint '{endpoint}'")
+
+    if not auth_breaker.allow_request():
+        raise CircuitOpenError()
+
+    # Hacer request al servicio de auth
+    client = get_auth_client()
+    try:
+        response = await client.post(
+            "/authorization/check-authorization",
+            headers={"Authorization": f"Bearer {token}"},
+            json=auth_payload
+        )
+    except httpx.RequestError:
+        auth_breaker.record_failure()
+        raise
+
+    # 401/403 son respuestas válidas del servicio; solo los errores cuentan como fallo
+    if response.status_code in (200, 401, 403):
+        auth_breaker.record_success()
+    else:
+        auth_breaker.record_failure()
+
+    # Manejar diferentes códigos de respuesta del servicio auth
+    if response.status_code == 401:
+        # Token inválido, expirado, o usuario no encontrado
+        auth_cache.evict_token(cache_key[0])
+        error_detail = "Invalid or expired token"
+        try:
+            error_info = response.json()
+            error_detail = error_info.get("detail", error_detail)
+        except:
+            pass
+
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=error_detail,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    elif response.status_code == 403:
+        # Usuario válido pero sin permisos suficientes
+        auth_cache.evict(cache_key)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access forbidden - insufficient permissions",
+        )
+
+    elif response.status_code == 500:
+        # Error interno del servicio auth
+        logger.error(f"Auth service internal error: {response.text}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service error",
+        )
+
+    elif response.status_code != 200:
+        # Cualquier otro error
+        logger.error(f"Unexpected auth service response: {response.status_code} - {response.text}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service unavailable",
+        )
+
+    # Procesar respuesta exitosa
+    auth_result = response.json()
+
+    if not auth_result.get("authorized", False):
+        missing_perms = auth_result.get("missing_permissions", [])
+        logger.warning(f"User lacks permissions. Missing: {missing_perms}")
+        auth_cache.evict(cache_key)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"You do not have enough permissions. Missing: {', '.join(missing_perms)}",
+        )
+
+    logger.info(f"Authorization successful for user {auth_result.get('user_email')}")
+
+    # Retornamos solo la información mínima necesaria
+    current_user = {
+        "user_id": auth_result.get("user_id"),
+        "user_email": auth_result.get("user_email")
+    }
+    auth_cache.set(cache_key, current_user)
+    return current_user
+
 def require_permission(permission: str):
     """
     Crea una dependencia que verifica si el usuario tiene un permiso específico.
 
-    Este módulo NO conoce nada sobre JWT o estructura de tokens.
-    Solo pasa el token al servicio de auth y recibe SÍ/NO.
+    Por defecto este módulo NO conoce nada sobre JWT o estructura de tokens:
+    solo pasa el token al servicio de auth y recibe SÍ/NO. Con
+    AUTH_JWT_OFFLINE_ENABLED los tokens con permisos embebidos se verifican
+    localmente y el servicio de auth queda como respaldo.
 
     Args:
         permission: El permiso requerido (ej: "nutripae-rh:create")
@@ -31,89 +197,38 @@ def require_permission(permission: str):
         try:
             token = credentials.credentials
 
-            # Obtener información del endpoint actual
-            endpoint_path = request.url.path
-            if endpoint_path.startswith(settings.API_PREFIX_STR):
-                endpoint_path = endpoint_path[len(settings.API_PREFIX_STR):]
-
-            endpoint = f"{settings.MODULE_IDENTIFIER}{endpoint_path}"
+            # Obtener la plantilla del endpoint actual (no el path con ids concretos)
+            endpoint = _route_template(request)
             method = request.method
 
-            # Preparar el payload para el servicio auth
-            auth_payload = {
-                "endpoint": endpoint,
-                "method": method,
-                "required_permissions": [permission]
-            }
-
-            logger.info(f"Checking authorization for user with permission '{permission}' on endpoint '{endpoint}'")
-
-            # Hacer request al servicio de auth
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"{settings.NUTRIPAE_AUTH_URL}/authorization/check-authorization",
-                    headers={"Authorization": f"Bearer {token}"},
-                    json=auth_payload
-                )
-
-                # Manejar diferentes códigos de respuesta del servicio auth
-                if response.status_code == 401:
-                    # Token inválido, expirado, o usuario no encontrado
-                    error_detail = "Invalid or expired token"
-                    try:
-                        error_info = response.json()
-                        error_detail = error_info.get("detail", error_detail)
-                    except:
-                        pass
-
-                    raise HTTPException(
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        detail=error_detail,
-                        headers={"WWW-Authenticate": "Bearer"},
-                    )
-
-                elif response.status_code == 403:
-                    # Usuario válido pero sin permisos suficientes
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="Access forbidden - insufficient permissions",
-                    )
-
-                elif response.status_code == 500:
-                    # Error interno del servicio auth
-                    logger.error(f"Auth service internal error: {response.text}")
-                    raise HTTPException(
-                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                        detail="Authentication service error",
-                    )
-
-                elif response.status_code != 200:
-                    # Cualquier otro error
-                    logger.error(f"Unexpected auth service response: {response.status_code} - {response.text}")
-                    raise HTTPException(
-                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                        detail="Authentication service unavailable",
-                    )
-
-                # Procesar respuesta exitosa
-                auth_result = response.json()
-
-                if not auth_result.get("authorized", False):
-                    missing_perms = auth_result.get("missing_permissions", [])
-                    logger.warning(f"User lacks permissions. Missing: {missing_perms}")
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail=f"You do not have enough permissions. Missing: {', '.join(missing_perms)}",
-                    )
-
-                logger.info(f"Authorization successful for user {auth_result.get('user_email')}")
-
-                # Retornamos solo la información mínima necesaria
-                return {
-                    "user_id": auth_result.get("user_id"),
-                    "user_email": auth_result.get("user_email")
-                }
+            cache_key = auth_cache.build_key(token, permission, method, endpoint)
+            cached_result = auth_cache.get(cache_key)
+            if cached_result is not None:
+                logger.debug(f"Authorization cache hit for permission '{permission}' on endpoint '{endpoint}'")
+                return cached_result
 
+            if jwt_verifier is not None:
+                local_result = await jwt_verifier.verify(token, permission)
+                if local_result is not None:
+                    return local_result
+
+            return await auth_single_flight.do(
+                cache_key,
+                lambda: _check_remote_authorization(token, permission, endpoint, method, cache_key),
+            )
+
+        except CircuitOpenError:
+            stale_result = auth_cache.get_stale(cache_key)
+            if stale_result is not None:
+                logger.warning(f"Auth circuit open, serving cached decision for permission '{permission}' on endpoint '{endpoint}'")
+                AUTH_CIRCUIT_REJECTIONS.labels(outcome="stale").inc()
+                return stale_result
+
+            AUTH_CIRCUIT_REJECTIONS.labels(outcome="unavailable").inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service unavailable",
+            )
         except httpx.TimeoutException:
             logger.error("Timeout connecting to authentication service")
             raise HTTPException(
@@ -154,3 +269,6 @@ def require_update():
 
 def require_delete():
     return require_permission("nutripae-cobertura:delete")
+
+def require_admin():
+    return require_permission("nutripae-cobertura:admin")
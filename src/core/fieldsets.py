@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Query
+from pydantic import create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, selectinload
+from sqlmodel import SQLModel
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    """Columnas (`fields`) y relaciones (`expand`) que se devuelven en la respuesta."""
+    fields: Tuple[str, ...]
+    expand: Tuple[str, ...] = ()
+
+    def load_options(self, model) -> list:
+        """
+        Opciones de carga para `select(model)`: solo las columnas pedidas más las
+        que necesitan la paginación keyset y los `selectinload` de las relaciones
+        expandidas. Sin expansión no se consulta ninguna tabla relacionada.
+        """
+        mapper = inspect(model)
+        columns = set(self.fields)
+        # La llave primaria y created_at siempre: identidad ORM y cursor keyset
+        columns.update(column.key for column in mapper.primary_key)
+        if "created_at" in mapper.columns:
+            columns.add("created_at")
+        for name in self.expand:
+            # selectinload de una relación muchos-a-uno necesita la FK local
+            columns.update(column.key for column in mapper.relationships[name].local_columns)
+        options = [load_only(*(getattr(model, name) for name in sorted(columns)))]
+        options.extend(selectinload(getattr(model, name)) for name in self.expand)
+        return options
+
+    def serialize(self, item) -> dict:
+        data = {name: getattr(item, name) for name in self.fields}
+        for name in self.expand:
+            value = getattr(item, name)
+            if isinstance(value, list):
+                data[name] = [related.model_dump() for related in value]
+            else:
+                data[name] = value.model_dump() if value is not None else None
+        return data
+
+
+def partial_model(model: Type[SQLModel]) -> Type[SQLModel]:
+    """
+    Copia de `model` con todos los campos opcionales, para usarla como
+    `response_model` con `response_model_exclude_unset=True`: los campos y
+    relaciones presentes se validan con su tipo (y se descarta lo que el esquema
+    no declara) y los que `fields`/`expand` no pidieron se omiten.
+    """
+    fields = {name: (Optional[field.annotation], None) for name, field in model.model_fields.items()}
+    return create_model(
+        f"{model.__name__}Fields",
+        __base__=SQLModel,
+        __doc__=f"{model.__name__}: solo incluye las columnas de `fields` y las relaciones de `expand`.",
+        **fields,
+    )
+
+
+def _parse(value: Optional[str], allowed: Sequence[str], parameter: str) -> Tuple[str, ...]:
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = sorted(requested.difference(allowed))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {parameter}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}",
+        )
+    # Orden estable del esquema, sin duplicados
+    return tuple(name for name in allowed if name in requested)
+
+
+def fieldset(
+    fields: Sequence[str], expand: Sequence[str] = (), default_expand: Sequence[str] = ()
+) -> Callable[..., Fieldset]:
+    """
+    Dependencia que lee `?fields=a,b` y `?expand=rel` y los valida contra las
+    columnas y relaciones permitidas. Sin `fields` se devuelven todas las columnas;
+    sin `expand` se cargan las relaciones de `default_expand` y `?expand=` (vacío)
+    no carga ninguna.
+    """
+    fields = tuple(fields)
+    expand = tuple(expand)
+    default_expand = tuple(default_expand)
+
+    def dependency(
+        fields_param: Optional[str] = Query(
+            None, alias="fields", description=f"Columnas separadas por coma: {', '.join(fields)}"
+        ),
+        expand_param: Optional[str] = Query(
+            None,
+            alias="expand",
+            description=(
+                f"Relaciones a incluir, separadas por coma: {', '.join(expand) or '-'}. "
+                f"Por omisión: {', '.join(default_expand) or 'ninguna'}"
+            ),
+        ),
+    ) -> Fieldset:
+        selected_fields = _parse(fields_param, fields, "fields") if fields_param else fields
+        if not selected_fields:
+            raise HTTPException(status_code=400, detail="fields must name at least one column")
+        selected_expand = _parse(expand_param, expand, "expand") if expand_param is not None else default_expand
+        return Fieldset(fields=selected_fields, expand=selected_expand)
+
+    return dependency
@@ -0,0 +1,87 @@
+import httpx
+import logging
+
+from core.config import settings
+from utils import AUTH_HTTP_POOL_CONNECTIONS_IDLE, AUTH_HTTP_POOL_CONNECTIONS_IN_USE
+
+logger = logging.getLogger(__name__)
+
+# Cliente único (por proceso) hacia nutripae-auth, creado en el lifespan de la app
+_auth_client: httpx.AsyncClient | None = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_auth_client() -> httpx.AsyncClient:
+    http2 = settings.AUTH_HTTP2_ENABLED
+    if http2 and not _http2_available():
+        logger.warning("AUTH_HTTP2_ENABLED is set but the 'h2' package is not installed, falling back to HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        base_url=settings.NUTRIPAE_AUTH_URL,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.AUTH_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AUTH_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.AUTH_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.AUTH_HTTP_CONNECT_TIMEOUT,
+            read=settings.AUTH_HTTP_READ_TIMEOUT,
+            write=settings.AUTH_HTTP_WRITE_TIMEOUT,
+            pool=settings.AUTH_HTTP_POOL_TIMEOUT,
+        ),
+    )
+
+
+async def start_auth_client() -> None:
+    global _auth_client
+    if _auth_client is None or _auth_client.is_closed:
+        _auth_client = build_auth_client()
+        logger.info(f"Auth service HTTP client started (base_url={settings.NUTRIPAE_AUTH_URL})")
+
+
+async def close_auth_client() -> None:
+    global _auth_client
+    if _auth_client is not None:
+        await _auth_client.aclose()
+        _auth_client = None
+        logger.info("Auth service HTTP client closed")
+
+
+def get_auth_client() -> httpx.AsyncClient:
+    """
+    Devuelve el cliente compartido. Si el lifespan no se ejecutó (ej: scripts o
+    TestClient sin contexto) se crea de forma perezosa.
+    """
+    global _auth_client
+    if _auth_client is None or _auth_client.is_closed:
+        _auth_client = build_auth_client()
+    return _auth_client
+
+
+def _pool_connections() -> list:
+    # httpx no expone estadísticas del pool; se leen del pool de httpcore
+    if _auth_client is None:
+        return []
+    pool = getattr(_auth_client._transport, "_pool", None)
+    return list(getattr(pool, "connections", []))
+
+
+def _connections_in_use() -> int:
+    return sum(1 for conn in _pool_connections() if not conn.is_idle() and not conn.is_closed())
+
+
+def _connections_idle() -> int:
+    return sum(1 for conn in _pool_connections() if conn.is_idle())
+
+
+AUTH_HTTP_POOL_CONNECTIONS_IN_USE.set_function(_connections_in_use)
+AUTH_HTTP_POOL_CONNECTIONS_IDLE.set_function(_connections_idle)
@@ -0,0 +1,107 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from core.config import settings
+
+
+@dataclass
+class ImportJob:
+    id: str
+    filename: str
+    status: str = "queued"  # queued, running, completed, failed
+    rows_processed: int = 0
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: List[dict] = field(default_factory=list)
+    errors_truncated: bool = False
+    detail: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def add_error(self, error: dict) -> None:
+        # Se guarda un máximo de errores; los contadores siguen siendo exactos
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append(error)
+        else:
+            self.errors_truncated = True
+
+    @property
+    def elapsed_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.rows_processed / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self, include_errors: bool = True) -> dict:
+        data = {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "rows_processed": self.rows_processed,
+            "created": self.created,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "detail": self.detail,
+            "created_at": self.created_at,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+            "errors_truncated": self.errors_truncated,
+        }
+        if include_errors:
+            data["errors"] = self.errors
+        return data
+
+
+class ImportJobRegistry:
+    """
+    Trabajos de importación en memoria del proceso.
+
+    Guarda el estado/progreso de cada trabajo y una referencia a su tarea
+    asyncio. Con varios workers, el estado solo se ve desde el worker que recibió
+    el archivo; se retienen a lo sumo `max_jobs` trabajos (se descartan primero
+    los terminados más antiguos).
+    """
+
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._tasks: dict = {}
+
+    def create(self, filename: str) -> ImportJob:
+        job = ImportJob(id=str(uuid.uuid4()), filename=filename)
+        self._jobs[job.id] = job
+        self._evict()
+        return job
+
+    def start(self, job: ImportJob, coroutine) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        return self._jobs.get(job_id)
+
+    def _evict(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ("completed", "failed")]
+        while len(self._jobs) > self.max_jobs and finished:
+            del self._jobs[finished.pop(0)]
+
+    async def cancel_all(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+import_jobs = ImportJobRegistry(max_jobs=settings.IMPORT_MAX_JOBS)
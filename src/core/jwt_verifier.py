@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+import httpx
+from fastapi import HTTPException, status
+from jose import ExpiredSignatureError, JWTError, jwt
+
+from core.config import settings
+from core.http_client import get_auth_client
+
+logger = logging.getLogger(__name__)
+
+
+class JWTVerifier:
+    """
+    Verificación local (sin llamada de red) de los JWT emitidos por nutripae-auth.
+
+    Las llaves públicas se descargan del JWKS del servicio de auth y se guardan en
+    memoria por `AUTH_JWKS_CACHE_TTL_SECONDS`. Un `kid` desconocido (rotación de
+    llaves) recarga el JWKS a lo sumo una vez cada `AUTH_JWKS_MIN_REFRESH_SECONDS`,
+    y tras una descarga fallida no se reintenta durante
+    `AUTH_JWKS_FAILURE_BACKOFF_SECONDS`. Solo se decide localmente cuando el
+    token trae el claim de permisos; en cualquier otro caso `verify` devuelve None
+    y el llamador debe consultar `/authorization/check-authorization`.
+    """
+
+    def __init__(self):
+        self._keys: List[dict] = []
+        self._keys_expires_at: float = 0.0
+        self._fetched_at: Optional[float] = None
+        self._retry_after: float = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _fetch_keys(self) -> List[dict]:
+        if settings.AUTH_JWT_PUBLIC_KEY:
+            return [{"kid": None, "key": settings.AUTH_JWT_PUBLIC_KEY}]
+
+        response = await get_auth_client().get(settings.AUTH_JWKS_PATH)
+        response.raise_for_status()
+        return [{"kid": jwk.get("kid"), "key": jwk} for jwk in response.json().get("keys", [])]
+
+    def _should_fetch(self, force_refresh: bool) -> bool:
+        now = time.monotonic()
+        if now < self._retry_after:
+            # La última descarga falló: se sigue con las llaves que haya
+            return False
+        if force_refresh:
+            # Un token con un `kid` inventado no puede forzar una descarga por petición
+            return self._fetched_at is None or now - self._fetched_at >= settings.AUTH_JWKS_MIN_REFRESH_SECONDS
+        return not self._keys or self._keys_expires_at <= now
+
+    async def _get_keys(self, force_refresh: bool = False) -> List[dict]:
+        if not self._should_fetch(force_refresh):
+            return self._keys
+
+        async with self._lock:
+            # Otra corrutina pudo refrescar (o fallar) mientras esperábamos el lock
+            if not self._should_fetch(force_refresh):
+                return self._keys
+            try:
+                self._keys = await self._fetch_keys()
+                self._fetched_at = time.monotonic()
+                self._keys_expires_at = self._fetched_at + settings.AUTH_JWKS_CACHE_TTL_SECONDS
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning(f"Could not fetch auth service public keys: {str(e)}")
+                self._retry_after = time.monotonic() + settings.AUTH_JWKS_FAILURE_BACKOFF_SECONDS
+            return self._keys
+
+    async def _find_key(self, kid: Optional[str]) -> Optional[dict]:
+        for force_refresh in (False, True):
+            keys = await self._get_keys(force_refresh=force_refresh)
+            for key in keys:
+                if key["kid"] is None or kid is None or key["kid"] == kid:
+                    return key["key"]
+        return None
+
+    async def verify(self, token: str, permission: str) -> Optional[dict]:
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            # No es un JWT legible: que decida el servicio de auth
+            return None
+
+        key = await self._find_key(header.get("kid"))
+        if key is None:
+            return None
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=settings.AUTH_JWT_ALGORITHMS,
+                audience=settings.AUTH_JWT_AUDIENCE,
+                issuer=settings.AUTH_JWT_ISSUER,
+                options={"verify_aud": settings.AUTH_JWT_AUDIENCE is not None},
+            )
+        except ExpiredSignatureError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has expired",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        except JWTError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        granted = claims.get(settings.AUTH_JWT_PERMISSIONS_CLAIM)
+        if not isinstance(granted, list):
+            # Token sin permisos embebidos: se consulta al servicio de auth
+            return None
+
+        module_permissions = {p for p in granted if isinstance(p, str) and p.startswith(f"{settings.MODULE_IDENTIFIER}:")}
+        if permission not in module_permissions:
+            logger.warning(f"User lacks permissions. Missing: {[permission]}")
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"You do not have enough permissions. Missing: {permission}",
+            )
+
+        return {
+            "user_id": claims.get("user_id", claims.get("sub")),
+            "user_email": claims.get("email", claims.get("user_email")),
+        }
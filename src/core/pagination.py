@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+from uuid import UUID
+
+# Posición de keyset: (created_at, id) del último elemento de la página
+Keyset = Tuple[datetime, UUID]
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, item_id: UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(item_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Keyset:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), UUID(item_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+
+def next_cursor(items: Sequence, limit: int) -> Optional[str]:
+    """Cursor de la siguiente página, o None si esta página es la última."""
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
+
+
+def set_next_cursor(response, items: Sequence, limit: int) -> None:
+    cursor = next_cursor(items, limit)
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
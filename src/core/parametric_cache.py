@@ -0,0 +1,68 @@
+import asyncio
+import time
+import unicodedata
+from typing import Dict, Optional
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models.disability_type import DisabilityType
+from models.document_type import DocumentType
+from models.etnic_group import EtnicGroup
+from models.gender import Gender
+from models.grade import Grade
+
+# Llaves foráneas de Beneficiary hacia tablas paramétricas: (campo, modelo, ¿admite null?)
+PARAMETRIC_FIELDS = [
+    ("document_type_id", DocumentType, False),
+    ("gender_id", Gender, False),
+    ("grade_id", Grade, False),
+    ("etnic_group_id", EtnicGroup, True),
+    ("disability_type_id", DisabilityType, True),
+]
+
+
+def normalize_name(value: str) -> str:
+    # "Pre-Jardín " y "pre-jardin" deben resolver al mismo id
+    value = unicodedata.normalize("NFKD", str(value).strip().lower())
+    return "".join(char for char in value if not unicodedata.combining(char))
+
+
+class ParametricCache:
+    """
+    Cache en memoria de las tablas paramétricas de beneficiarios.
+
+    Por cada campo `*_id` guarda el mapa nombre normalizado -> id, para resolver
+    los nombres de los archivos importados sin una consulta por fila. Se recarga
+    cuando vence el TTL o tras `invalidate()`; como puede estar desactualizado,
+    las llaves se validan contra la base (`bulk_create_beneficiaries`).
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lookups: Optional[Dict[str, Dict[str, int]]] = None
+        self._expires_at: float = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, session: AsyncSession) -> Dict[str, Dict[str, int]]:
+        if self._lookups is not None and self._expires_at > time.monotonic():
+            return self._lookups
+
+        async with self._lock:
+            if self._lookups is not None and self._expires_at > time.monotonic():
+                return self._lookups
+            lookups = {}
+            for field, model, _ in PARAMETRIC_FIELDS:
+                rows = (await session.exec(select(model.id, model.name))).all()
+                lookups[field] = {normalize_name(name): id for id, name in rows}
+            self._lookups = lookups
+            self._expires_at = time.monotonic() + self.ttl_seconds
+            return lookups
+
+    def invalidate(self) -> None:
+        self._lookups = None
+        self._expires_at = 0.0
+
+
+parametric_cache = ParametricCache(ttl_seconds=settings.PARAMETRIC_CACHE_TTL_SECONDS)
@@ -0,0 +1,41 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from utils import AUTH_SINGLE_FLIGHT_CALLS, AUTH_SINGLE_FLIGHT_COALESCED
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes con la misma llave en una sola ejecución.
+
+    La primera petición lanza la corrutina como tarea; las siguientes esperan el
+    mismo resultado (o excepción). La tarea se protege con `asyncio.shield` para
+    que la cancelación de un cliente no cancele la llamada de los demás.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, "asyncio.Task"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is not None:
+            AUTH_SINGLE_FLIGHT_COALESCED.inc()
+            return await asyncio.shield(task)
+
+        AUTH_SINGLE_FLIGHT_CALLS.inc()
+        task = asyncio.ensure_future(fn())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Marca la excepción como recuperada aunque todos los que esperaban se hayan cancelado
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
@@ -0,0 +1,164 @@
+import logging
+import os
+import sys
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Iterator, List, Optional
+
+from core.config import settings
+from utils import DB_SLOW_QUERIES, REQUEST_QUERY_STATS
+
+try:
+    from greenlet import getcurrent
+except ImportError:  # pragma: no cover - greenlet viene con el motor async de SQLAlchemy
+    getcurrent = None
+
+logger = logging.getLogger(__name__)
+
+# Directorios cuyo código consideramos "origen" de una sentencia
+_ORIGIN_DIRS = tuple(f"{os.sep}{name}{os.sep}" for name in ("repositories", "services", "routes"))
+
+_EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+
+def _iter_frames() -> Iterator[Any]:
+    frame = sys._getframe(2)
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+    # Con el motor async la sentencia corre dentro de un greenlet: el código de la
+    # aplicación (repositorio, servicio, ruta) está en la pila del greenlet padre
+    parent = getcurrent().parent if getcurrent is not None else None
+    while parent is not None:
+        frame = parent.gr_frame
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+        parent = parent.parent
+
+
+def _find_origin() -> Optional[str]:
+    for frame in _iter_frames():
+        if any(part in frame.f_code.co_filename for part in _ORIGIN_DIRS):
+            owner = frame.f_locals.get("self")
+            if owner is not None:
+                return f"{type(owner).__name__}.{frame.f_code.co_name}"
+            return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+    return None
+
+
+def _parameters_shape(parameters: Any, executemany: bool) -> Any:
+    # Solo los tipos: los valores pueden contener datos personales de beneficiarios
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameters[0] if parameters else None
+        return {"rows": len(parameters), "row": _parameters_shape(first, False)}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+class SlowQueryLog:
+    """
+    Buffer circular en memoria con las sentencias más lentas que el umbral.
+
+    Por cada sentencia guarda el texto parametrizado, la forma de los parámetros,
+    el método de repositorio/servicio que la originó, la ruta de la petición y,
+    opcionalmente, el plan `EXPLAIN (FORMAT JSON)`.
+    """
+
+    def __init__(self, threshold_ms: float, max_entries: int, explain: bool = False, explain_analyze: bool = False):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.explain_analyze = explain_analyze
+        self._entries: Deque[dict] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def maybe_record(
+        self,
+        conn,
+        statement: str,
+        parameters: Any,
+        context,
+        executemany: bool,
+        duration: float,
+        error: Optional[str] = None,
+    ) -> None:
+        """`error` ("timeout" o "error") marca las sentencias que fallaron."""
+        duration_ms = duration * 1000
+        if self.threshold_ms <= 0 or duration_ms < self.threshold_ms:
+            return
+
+        stats = REQUEST_QUERY_STATS.get()
+        entry = {
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "statement": statement,
+            "parameters_shape": _parameters_shape(parameters, executemany),
+            "origin": _find_origin(),
+            "method": stats.method if stats else None,
+            "route": stats.path if stats else None,
+            "plan": None,
+            "error": error,
+        }
+
+        # Tras un error la transacción está abortada: no admite el EXPLAIN
+        if error is None and self.explain and self._can_explain(statement, context, executemany):
+            entry["plan"] = self._explain(conn, statement, parameters)
+
+        DB_SLOW_QUERIES.labels(path=entry["route"] or "").inc()
+        outcome = f", {error}" if error else ""
+        logger.warning(f"Slow query ({entry['duration_ms']} ms{outcome}) from {entry['origin']} on {entry['method']} {entry['route']}: {statement[:200]}")
+
+        with self._lock:
+            self._entries.append(entry)
+
+    @staticmethod
+    def _can_explain(statement: str, context, executemany: bool) -> bool:
+        if executemany:
+            return False
+        # Un cursor del lado del servidor mantiene la conexión ocupada
+        if context is not None and context.execution_options.get("stream_results"):
+            return False
+        return statement.lstrip().upper().startswith(("SELECT", "WITH"))
+
+    def _explain(self, conn, statement: str, parameters: Any) -> Any:
+        options = "ANALYZE, FORMAT JSON" if self.explain_analyze else "FORMAT JSON"
+        # Cursor nuevo sobre la misma conexión DBAPI: el original aún tiene filas por leer
+        explain_cursor = conn.connection.cursor()
+        try:
+            # El savepoint evita que un EXPLAIN fallido aborte la transacción de la petición
+            explain_cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            try:
+                explain_cursor.execute(f"EXPLAIN ({options}) {statement}", parameters)
+                plan = explain_cursor.fetchone()[0]
+            except Exception as e:
+                explain_cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+                return {"error": str(e)}
+            explain_cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            return plan
+        except Exception as e:
+            logger.warning(f"Could not capture EXPLAIN for slow query: {str(e)}")
+            return {"error": str(e)}
+        finally:
+            explain_cursor.close()
+
+    def entries(self, limit: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.DB_SLOW_QUERY_THRESHOLD_MS,
+    max_entries=settings.DB_SLOW_QUERY_LOG_SIZE,
+    explain=settings.DB_SLOW_QUERY_EXPLAIN,
+    explain_analyze=settings.DB_SLOW_QUERY_EXPLAIN_ANALYZE,
+)
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+from contextlib import aclosing
+from typing import Any, AsyncIterable, AsyncIterator, List
+
+
+# Tamaño aproximado de cada chunk de texto enviado al cliente
+CHUNK_BYTES = 64 * 1024
+
+
+def _dumps(item: Any) -> str:
+    # default=str cubre UUID, fechas y Decimal sin pasar por pydantic fila a fila
+    return json.dumps(item, default=str, ensure_ascii=False)
+
+
+async def stream_json_array(items: AsyncIterable[dict]) -> AsyncIterator[bytes]:
+    """
+    Serializa `items` como un arreglo JSON, un elemento por chunk.
+
+    `items` se cierra junto con el stream (también si el cliente corta), para
+    que libere la sesión que lo alimenta (ver `database.stream_with_session`).
+    """
+    async with aclosing(items):
+        yield b"["
+        first = True
+        async for item in items:
+            yield (("" if first else ",") + _dumps(item)).encode("utf-8")
+            first = False
+        yield b"]"
+
+
+async def stream_ndjson(items: AsyncIterable[dict]) -> AsyncIterator[bytes]:
+    """Serializa `items` como JSON por líneas, agrupando líneas en chunks de ~64 KB."""
+    async with aclosing(items):
+        buffer: List[str] = []
+        size = 0
+        async for item in items:
+            line = _dumps(item) + "\n"
+            buffer.append(line)
+            size += len(line)
+            if size >= CHUNK_BYTES:
+                yield "".join(buffer).encode("utf-8")
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer).encode("utf-8")
+
+
+async def stream_csv(items: AsyncIterable[dict], fieldnames: List[str]) -> AsyncIterator[bytes]:
+    """Serializa `items` como CSV con encabezado, en chunks de ~64 KB."""
+    async with aclosing(items):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        async for item in items:
+            writer.writerow(item)
+            if buffer.tell() >= CHUNK_BYTES:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
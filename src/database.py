@@ -1,10 +1,261 @@
 # pae_cobertura/database.py
+import logging
+import time
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import AsyncIterable, AsyncIterator, Callable
+
+from fastapi import Request
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from core.auth_cache import hash_token
 from core.config import settings
+from core.slow_query_log import slow_query_log
+from utils import (DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT_WAIT, DB_POOL_OVERFLOW,
+                   DB_POOL_SIZE, DB_POOL_TIMEOUTS, DB_SESSION_ROUTING,
+                   record_query)
+
+logger = logging.getLogger(__name__)
+
+
+class _CheckoutTimingMixin:
+    """Mide el tiempo de espera por una conexión libre del pool."""
+
+    pool_name = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.labels(pool=self.pool_name).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(pool=self.pool_name).observe(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_pool(engine: Engine, name: str) -> None:
+    pool = engine.pool
+    if isinstance(pool, _CheckoutTimingMixin):
+        pool.pool_name = name
+    if isinstance(pool, QueuePool):
+        DB_POOL_SIZE.labels(pool=name).set(pool.size())
+        DB_POOL_CHECKED_OUT.labels(pool=name).set_function(pool.checkedout)
+        DB_POOL_OVERFLOW.labels(pool=name).set_function(pool.overflow)
+
+
+def instrument_queries(engine: Engine) -> None:
+    """
+    Registra cantidad y duración de cada sentencia en las estadísticas de la
+    petición, también las que fallan (violaciones de unicidad, llaves foráneas,
+    statement_timeout), que no pasan por `after_cursor_execute`.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Marca por ejecución en el contexto (no en la conexión del pool): si la
+        # sentencia falla no queda ningún valor pendiente en la conexión
+        if context is not None:
+            context._query_start_time = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_start_time", None)
+        if started is None:
+            return
+        context._query_start_time = None
+        duration = time.perf_counter() - started
+        record_query(statement, duration)
+        slow_query_log.maybe_record(conn, statement, parameters, context, executemany, duration)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        context = exception_context.execution_context
+        started = getattr(context, "_query_start_time", None)
+        # Sin marca el error ocurrió antes de enviar la sentencia (o fuera de una)
+        if started is None or exception_context.statement is None:
+            return
+        context._query_start_time = None
+        duration = time.perf_counter() - started
+        record_query(exception_context.statement, duration)
+        # 57014 (query_canceled): la cancela statement_timeout, p. ej. la búsqueda por nombre
+        error = "timeout" if getattr(exception_context.original_exception, "sqlstate", None) == "57014" else "error"
+        slow_query_log.maybe_record(
+            exception_context.connection,
+            exception_context.statement,
+            exception_context.parameters,
+            context,
+            context.executemany,
+            duration,
+            error=error,
+        )
+
+
+def _pool_options() -> dict:
+    return dict(
+        echo=settings.DB_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+def async_database_url(url: str) -> str:
+    # Misma base de datos, pero con el driver asyncpg
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def build_engine(url: str, name: str) -> Engine:
+    engine = create_engine(url, poolclass=InstrumentedQueuePool, **_pool_options())
+    instrument_pool(engine, name)
+    instrument_queries(engine)
+    return engine
+
+
+def build_async_engine(url: str, name: str) -> AsyncEngine:
+    engine = create_async_engine(async_database_url(url), poolclass=InstrumentedAsyncQueuePool, **_pool_options())
+    instrument_pool(engine.sync_engine, name)
+    instrument_queries(engine.sync_engine)
+    return engine
+
+
+# Motor síncrono: usado por scripts (seed) y tareas fuera del ciclo de la API
+engine = build_engine(settings.DATABASE_URL, "primary-sync")
+
+# Motor asíncrono: usado por todas las rutas de la API
+async_engine = build_async_engine(settings.DATABASE_URL, "primary")
+
+# Réplica de solo lectura (opcional)
+replica_engine = (
+    build_async_engine(settings.DATABASE_REPLICA_URL, "replica")
+    if settings.DATABASE_REPLICA_URL else None
+)
+
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReadReplicaRouter:
+    """
+    Decide si una petición puede leer de la réplica.
+
+    - Los métodos de escritura siempre van al primario y registran la hora de la
+      escritura del cliente; durante `read_your_writes_seconds` sus lecturas
+      también van al primario para que vea sus propios cambios.
+    - Si la réplica falla al conectar, se marca como caída durante
+      `retry_seconds` y las lecturas vuelven al primario.
+
+    El registro de escrituras es por proceso (por worker).
+    """
+
+    def __init__(self, read_your_writes_seconds: float, retry_seconds: float, max_clients: int = 10000):
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.retry_seconds = retry_seconds
+        self.max_clients = max_clients
+        self._last_write: "OrderedDict[str, float]" = OrderedDict()
+        self._replica_down_until: float = 0.0
+
+    def record_write(self, client_key: str) -> None:
+        self._last_write[client_key] = time.monotonic()
+        self._last_write.move_to_end(client_key)
+        while len(self._last_write) > self.max_clients:
+            self._last_write.popitem(last=False)
+
+    def wrote_recently(self, client_key: str) -> bool:
+        last_write = self._last_write.get(client_key)
+        if last_write is None:
+            return False
+        if time.monotonic() - last_write >= self.read_your_writes_seconds:
+            del self._last_write[client_key]
+            return False
+        return True
+
+    def replica_available(self) -> bool:
+        return self._replica_down_until <= time.monotonic()
+
+    def mark_replica_down(self) -> None:
+        self._replica_down_until = time.monotonic() + self.retry_seconds
+
+
+replica_router = ReadReplicaRouter(
+    read_your_writes_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+    retry_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+)
+
+
+def _client_key(request: Request) -> str:
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return hash_token(authorization)
+    return request.client.host if request.client else "anonymous"
+
+
+async def _open_replica_session() -> AsyncSession | None:
+    session = AsyncSession(replica_engine, expire_on_commit=False)
+    try:
+        # Fuerza la conexión ahora para poder volver al primario si la réplica no responde
+        await session.connection()
+    except (exc.DBAPIError, OSError) as e:
+        await session.close()
+        logger.warning(f"Read replica unavailable, falling back to primary: {str(e)}")
+        replica_router.mark_replica_down()
+        return None
+    return session
+
+
+async def _open_routed_session(request: Request) -> AsyncSession:
+    if replica_engine is not None:
+        client_key = _client_key(request)
+        if request.method not in READ_ONLY_METHODS:
+            replica_router.record_write(client_key)
+        elif not replica_router.wrote_recently(client_key) and replica_router.replica_available():
+            session = await _open_replica_session()
+            if session is not None:
+                DB_SESSION_ROUTING.labels(target="replica").inc()
+                return session
+            DB_SESSION_ROUTING.labels(target="replica_fallback").inc()
+            return AsyncSession(async_engine, expire_on_commit=False)
+
+    DB_SESSION_ROUTING.labels(target="primary").inc()
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+
+async def stream_with_session(
+    request: Request,
+    produce: Callable[[AsyncSession], AsyncIterable[dict]],
+) -> AsyncIterator[dict]:
+    """
+    Para respuestas en streaming: en FastAPI 0.115 la dependencia
+    `get_async_session` se cierra antes de enviar el cuerpo, así que la sesión se
+    abre aquí al empezar a iterar y se cierra al terminar (o cortarse) el stream.
+    Si la respuesta nunca llega a enviarse no queda ninguna sesión abierta.
+    """
+    async with await _open_routed_session(request) as session:
+        async with aclosing(produce(session)) as items:
+            async for item in items:
+                yield item
 
-engine = create_engine(settings.DATABASE_URL, echo=True)
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+async def get_async_session(request: Request):
+    # Lecturas a la réplica (si existe) y escrituras al primario; en ambos casos
+    # expire_on_commit=False evita IO implícito al leer atributos tras el commit
+    async with await _open_routed_session(request) as session:
+        yield session
@@ -0,0 +1,26 @@
+import argparse
+import asyncio
+import logging
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import async_engine
+from services.coverage_export import ParquetUnavailableError, export_coverage_parquet
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def export_coverages(path: str) -> int:
+    try:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            return await export_coverage_parquet(session, path)
+    finally:
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta la tabla de hechos de coberturas a Parquet")
+    parser.add_argument("path", nargs="?", default="coverages.parquet", help="Archivo de salida")
+    args = parser.parse_args()
+    try:
+        asyncio.run(export_coverages(args.path))
+    except ParquetUnavailableError as e:
+        logger.error(f"Error exporting coverages: {e}")
+        raise SystemExit(1)
@@ -1,4 +1,5 @@
 # pae_cobertura/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
@@ -9,8 +10,14 @@ from routes.campus import router as campuses_router
 from routes.parametrics import router as parametrics_router
 from routes.beneficiary import router as beneficiary_router
 from routes.coverage import router as coverage_router
+from routes.admin import router as admin_router
 from core.config import settings
-from utils import PrometheusMiddleware, metrics, setting_otlp
+from core.dependencies import register_route_templates
+from core.pagination import NEXT_CURSOR_HEADER
+from core.http_client import close_auth_client, start_auth_client
+from core.import_jobs import import_jobs
+from database import async_engine, replica_engine
+from utils import PrometheusMiddleware, QueryStatsMiddleware, metrics, setting_otlp
 import uvicorn
 import logging
 
@@ -37,13 +44,33 @@ def custom_openapi():
     app.openapi_schema = openapi_schema
     return app.openapi_schema
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Un solo cliente HTTP (con keep-alive) hacia nutripae-auth por proceso
+    await start_auth_client()
+    register_route_templates(app.routes)
+    yield
+    await import_jobs.cancel_all()
+    await close_auth_client()
+    await async_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
 app = FastAPI(
     title=settings.APP_NAME,
     description="Sistema para gestionar la estructura geográfica y de beneficiarios del PAE.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(PrometheusMiddleware, app_name=settings.APP_NAME)
+app.add_middleware(
+    QueryStatsMiddleware,
+    app_name=settings.APP_NAME,
+    statement_budget=settings.DB_QUERY_BUDGET,
+    repeat_threshold=settings.DB_QUERY_REPEAT_THRESHOLD,
+    server_timing=settings.DB_SERVER_TIMING_ENABLED,
+)
 app.add_route("/metrics", metrics)
 # Setting OpenTelemetry exporter
 setting_otlp(app, settings.APP_NAME, settings.OTLP_GRPC_ENDPOINT)
@@ -66,6 +93,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Permite todos los métodos
     allow_headers=["*"],  # Permite todos los headers
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
 )
 
 app.include_router(beneficiary_router, prefix=settings.API_PREFIX_STR, tags=["Beneficiaries"])
@@ -75,6 +103,7 @@ app.include_router(departments_router, prefix=settings.API_PREFIX_STR, tags=["De
 app.include_router(institutions_router, prefix=settings.API_PREFIX_STR, tags=["Institutions"])
 app.include_router(towns_router, prefix=settings.API_PREFIX_STR, tags=["Towns"])
 app.include_router(parametrics_router, prefix=settings.API_PREFIX_STR, tags=["Parametrics"])
+app.include_router(admin_router, prefix=settings.API_PREFIX_STR, tags=["Admin"])
 
 @app.get("/")
 def read_root():
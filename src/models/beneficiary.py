@@ -3,7 +3,7 @@ from datetime import datetime, date
 from sqlmodel import Field, Relationship, SQLModel, String
 import uuid
 from uuid import UUID
-from sqlalchemy import Boolean, Integer, Date
+from sqlalchemy import Boolean, Integer, Date, Index, text
 
 # Para evitar error de "circular import" con las relaciones
 from typing import TYPE_CHECKING
@@ -17,6 +17,30 @@ if TYPE_CHECKING:
     from .disability_type import DisabilityType
 
 class Beneficiary(SQLModel, table=True):
+    __table_args__ = (
+        # Orden estable para la paginación por cursor (keyset)
+        Index("ix_beneficiary_created_at_id", "created_at", "id"),
+        # Filtros del listado combinados con el orden keyset (created_at, id).
+        # Las columnas poco pobladas o booleanas usan índices parciales
+        Index("ix_beneficiary_grade_id_created_at_id", "grade_id", "created_at", "id"),
+        Index(
+            "ix_beneficiary_etnic_group_id_created_at_id", "etnic_group_id", "created_at", "id",
+            postgresql_where=text("etnic_group_id IS NOT NULL"),
+        ),
+        Index(
+            "ix_beneficiary_disability_type_id_created_at_id", "disability_type_id", "created_at", "id",
+            postgresql_where=text("disability_type_id IS NOT NULL"),
+        ),
+        Index("ix_beneficiary_victim_conflict_created_at_id", "created_at", "id", postgresql_where=text("victim_conflict")),
+        Index("ix_beneficiary_retired_created_at_id", "created_at", "id", postgresql_where=text("retirement_date IS NOT NULL")),
+        # Búsqueda por nombre sin tildes (pg_trgm); la función la crea la migración
+        Index(
+            "ix_beneficiary_search_name_trgm",
+            text("beneficiary_search_name(first_name, second_name, first_surname, second_surname) gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+    )
+
     id: UUID = Field(default_factory=uuid.uuid4, primary_key=True)
 
     document_type_id: int = Field(foreign_key="document_type.id", nullable=False)
@@ -20,7 +20,10 @@ class Campus(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.now)
     deleted_at: Optional[datetime] = Field(default=None)
 
-    institution_id: int = Field(foreign_key="institution.id")
+    # Contador desnormalizado, mantenido por triggers en la base de datos
+    number_of_coverages: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
+    institution_id: int = Field(foreign_key="institution.id", index=True)
     institution: "Institution" = Relationship(back_populates="campuses")
 
     coverage: List["Coverage"] = Relationship(back_populates="campus")
@@ -1,6 +1,7 @@
 from datetime import datetime, date
 from typing import Optional
 from sqlmodel import Field, Relationship, SQLModel, Date
+from sqlalchemy import Index
 import uuid
 from uuid import UUID
 
@@ -11,14 +12,26 @@ if TYPE_CHECKING:
     from .beneficiary import Beneficiary
     from .benefit_type import BenefitType
 
+COVERAGE_UNIQUE_CONSTRAINT = "uq_coverage_beneficiary_benefit_type_campus"
+
 class Coverage(SQLModel, table=True):
+    __table_args__ = (
+        # Orden estable para la paginación por cursor (keyset)
+        Index("ix_coverage_created_at_id", "created_at", "id"),
+        Index("ix_coverage_campus_id_created_at_id", "campus_id", "created_at", "id"),
+        # Un beneficiario no puede tener el mismo tipo de beneficio dos veces en la
+        # misma sede. También sirve de índice para la llave foránea beneficiary_id
+        # (campus_id ya está cubierto por el índice anterior)
+        Index(COVERAGE_UNIQUE_CONSTRAINT, "beneficiary_id", "benefit_type_id", "campus_id", unique=True),
+    )
+
     id: UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     active: bool = Field(default=True)
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
     deleted_at: Optional[datetime] = Field(default=None)
 
-    benefit_type_id: int = Field(foreign_key="benefit_type.id", nullable=False)
+    benefit_type_id: int = Field(foreign_key="benefit_type.id", nullable=False, index=True)
     benefit_type: "BenefitType" = Relationship(back_populates="coverages")
 
     campus_id: int = Field(foreign_key="campus.id")
@@ -15,4 +15,7 @@ class Department(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.now)
     deleted_at: Optional[datetime] = Field(default=None)
 
+    # Contador desnormalizado, mantenido por triggers en la base de datos
+    number_of_towns: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
     towns: List["Town"] = Relationship(back_populates="department")
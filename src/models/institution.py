@@ -16,7 +16,10 @@ class Institution(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.now)
     deleted_at: Optional[datetime] = Field(default=None)
 
-    town_id: int = Field(foreign_key="town.id")
+    # Contador desnormalizado, mantenido por triggers en la base de datos
+    number_of_campuses: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
+    town_id: int = Field(foreign_key="town.id", index=True)
     town: "Town" = Relationship(back_populates="institutions")
 
     campuses: List["Campus"] = Relationship(back_populates="institution")
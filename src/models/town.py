@@ -16,6 +16,9 @@ class Town(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.now)
     deleted_at: Optional[datetime] = Field(default=None)
 
+    # Contador desnormalizado, mantenido por triggers en la base de datos
+    number_of_institutions: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
     department_id: int = Field(foreign_key="department.id")
     department: "Department" = Relationship(back_populates="towns")
 
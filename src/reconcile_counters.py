@@ -0,0 +1,57 @@
+import logging
+from sqlalchemy import text, update
+from sqlmodel import func, select
+from database import engine
+from models import Department, Town, Institution, Campus, Coverage
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (modelo padre, columna contador, modelo hijo, llave foránea en el hijo)
+COUNTERS = [
+    (Department, Department.number_of_towns, Town, Town.department_id),
+    (Town, Town.number_of_institutions, Institution, Institution.town_id),
+    (Institution, Institution.number_of_campuses, Campus, Campus.institution_id),
+    (Campus, Campus.number_of_coverages, Coverage, Coverage.campus_id),
+]
+
+def reconcile_counters() -> dict:
+    """
+    Recalcula los contadores desnormalizados de la jerarquía y corrige los que
+    difieran del conteo real. Devuelve cuántas filas se corrigieron por contador.
+    """
+    repaired = {}
+    try:
+        for parent, counter, child, fk in COUNTERS:
+            # Una transacción por contador. El LOCK bloquea escrituras sobre la
+            # tabla hija mientras se recalcula, para que ningún trigger concurrente
+            # quede fuera del conteo
+            with engine.begin() as conn:
+                conn.execute(text(f"LOCK TABLE {child.__tablename__} IN SHARE MODE"))
+
+                actual = (
+                    select(func.count(child.id))
+                    .where(fk == parent.id)
+                    .scalar_subquery()
+                )
+                statement = (
+                    update(parent)
+                    .where(counter != actual)
+                    .values({counter.key: actual})
+                    .returning(parent.id)
+                )
+                ids = conn.execute(statement).scalars().all()
+
+            repaired[counter.key] = len(ids)
+            if ids:
+                logger.warning(f"Repaired {len(ids)} drifted {counter.key} counters on {parent.__tablename__}: {ids[:20]}")
+            else:
+                logger.info(f"{parent.__tablename__}.{counter.key} is consistent")
+    except Exception as e:
+        logger.error(f"Error reconciling counters: {e}")
+        raise
+
+    return repaired
+
+if __name__ == "__main__":
+    reconcile_counters()
@@ -1,67 +1,221 @@
 from datetime import datetime
+from typing import AsyncIterator
 from uuid import UUID
-from sqlmodel import Session, select
-from sqlalchemy.orm import selectinload
+from sqlmodel import Integer, String, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import any_, bindparam, literal, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import IntegrityError
 
+from core.db_errors import raise_for_constraint
+from core.fieldsets import Fieldset
+from core.pagination import Keyset
 from models.beneficiary import Beneficiary
-from schemas.beneficiary import BeneficiaryCreate, BeneficiaryUpdate
+from models.campus import Campus
+from models.coverage import Coverage
+from models.institution import Institution
+from schemas.beneficiary import BeneficiaryCreate, BeneficiaryFilters, BeneficiaryUpdate
+
+# Índice único -> mensaje (el de la antigua validación del servicio)
+BENEFICIARY_CONSTRAINT_MESSAGES = {
+    "ix_beneficiary_number_document": "A beneficiary with document number {number_document} already exists.",
+}
 
 class BeneficiaryRepository:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def create(self, *, beneficiary_in: BeneficiaryCreate) -> Beneficiary:
-        db_beneficiary = Beneficiary.model_validate(beneficiary_in)
-        self.session.add(db_beneficiary)
-        self.session.commit()
-        self.session.refresh(db_beneficiary)
+    async def create(self, *, beneficiary_in: BeneficiaryCreate) -> Beneficiary:
+        values = Beneficiary.model_validate(beneficiary_in).model_dump()
+        statement = insert(Beneficiary).values(**values).returning(Beneficiary)
+        try:
+            db_beneficiary = (await self.session.exec(statement)).scalar_one()
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise_for_constraint(e, BENEFICIARY_CONSTRAINT_MESSAGES, values)
         return db_beneficiary
 
-    def get_by_id(self, *, beneficiary_id: UUID) -> Beneficiary | None:
+    async def get_by_id(self, *, beneficiary_id: UUID, fieldset: Fieldset | None = None) -> Beneficiary | None:
+        statement = select(Beneficiary).where(Beneficiary.id == beneficiary_id)
+        if fieldset is not None:
+            statement = statement.options(*fieldset.load_options(Beneficiary))
+        return (await self.session.exec(statement)).first()
+
+    async def get_all(
+        self,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Keyset | None = None,
+        filters: BeneficiaryFilters | None = None,
+        fieldset: Fieldset | None = None,
+    ) -> list[Beneficiary]:
         statement = (
             select(Beneficiary)
+            .order_by(Beneficiary.created_at, Beneficiary.id)
+            .limit(limit)
+        )
+        if fieldset is not None:
+            statement = statement.options(*fieldset.load_options(Beneficiary))
+        if filters is not None:
+            statement = self._apply_filters(statement, filters)
+        # Keyset: con cursor se continúa después del último (created_at, id) visto
+        if after is not None:
+            statement = statement.where(tuple_(Beneficiary.created_at, Beneficiary.id) > tuple_(*after))
+        else:
+            statement = statement.offset(skip)
+        return (await self.session.exec(statement)).all()
+
+    async def update(
+        self, *, beneficiary_id: UUID, beneficiary_in: BeneficiaryUpdate
+    ) -> Beneficiary | None:
+        update_data = beneficiary_in.model_dump(exclude_unset=True)
+        statement = (
+            update(Beneficiary)
             .where(Beneficiary.id == beneficiary_id)
-            .options(
-                selectinload(Beneficiary.document_type),
-                selectinload(Beneficiary.gender),
-                selectinload(Beneficiary.grade),
-                selectinload(Beneficiary.etnic_group),
-                selectinload(Beneficiary.disability_type),
-                selectinload(Beneficiary.coverage)
-            )
+            .values(**update_data, updated_at=datetime.now())
+            .returning(Beneficiary)
         )
-        return self.session.exec(statement).first()
+        try:
+            db_beneficiary = (await self.session.exec(statement)).scalar_one_or_none()
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise_for_constraint(e, BENEFICIARY_CONSTRAINT_MESSAGES, update_data)
+        return db_beneficiary
+
+    async def delete(self, *, db_beneficiary: Beneficiary):
+        await self.session.delete(db_beneficiary)
+        await self.session.commit()
+        return True
+
+    async def search(self, *, q: str, limit: int, similarity_threshold: float, timeout_ms: int) -> list[dict]:
+        # Mismo nombre normalizado que el índice GIN ix_beneficiary_search_name_trgm
+        full_name = func.beneficiary_search_name(
+            Beneficiary.first_name,
+            Beneficiary.second_name,
+            Beneficiary.first_surname,
+            Beneficiary.second_surname,
+        )
+        query = func.lower(func.immutable_unaccent(literal(q)))
+        similarity = func.word_similarity(query, full_name)
+
+        # Ambos valores son locales a la transacción: no afectan a otras
+        # peticiones que reutilicen la conexión del pool
+        await self.session.exec(select(
+            func.set_config("statement_timeout", f"{timeout_ms}ms", True),
+            func.set_config("pg_trgm.word_similarity_threshold", str(similarity_threshold), True),
+        ))
 
-    def get_all(self, *, skip: int = 0, limit: int = 100) -> list[Beneficiary]:
         statement = (
-            select(Beneficiary)
-            .offset(skip)
-            .limit(limit)
-            .options(
-                selectinload(Beneficiary.document_type),
-                selectinload(Beneficiary.gender),
-                selectinload(Beneficiary.grade),
-                selectinload(Beneficiary.etnic_group),
-                selectinload(Beneficiary.disability_type)
+            select(
+                Beneficiary.id,
+                Beneficiary.number_document,
+                Beneficiary.first_name,
+                Beneficiary.second_name,
+                Beneficiary.first_surname,
+                Beneficiary.second_surname,
+                similarity.label("similarity"),
             )
+            .where(query.op("<%")(full_name))
+            .order_by(similarity.desc(), Beneficiary.first_surname, Beneficiary.id)
+            .limit(limit)
         )
-        return self.session.exec(statement).all()
+        return (await self.session.exec(statement)).mappings().all()
 
-    def update(
-        self, *, db_beneficiary: Beneficiary, beneficiary_in: BeneficiaryUpdate
-    ) -> Beneficiary:
-        update_data = beneficiary_in.model_dump(exclude_unset=True)
+    async def get_existing_documents(self, *, number_documents: list[str]) -> set[str]:
+        # Un solo parámetro de tipo arreglo: un IN con decenas de miles de
+        # valores supera el límite de parámetros del protocolo de Postgres
+        documents = bindparam("number_documents", number_documents, type_=ARRAY(String))
+        statement = (
+            select(Beneficiary.number_document)
+            .where(Beneficiary.number_document == any_(documents))
+        )
+        return set((await self.session.exec(statement)).all())
 
-        for key, value in update_data.items():
-            setattr(db_beneficiary, key, value)
+    async def get_existing_ids(self, *, model, ids: list[int]) -> set[int]:
+        # Ids de `ids` que existen en la tabla de `model`, con un solo parámetro arreglo
+        statement = select(model.id).where(model.id == any_(bindparam("ids", ids, type_=ARRAY(Integer))))
+        return set((await self.session.exec(statement)).all())
 
-        db_beneficiary.updated_at = datetime.now()
-        self.session.add(db_beneficiary)
-        self.session.commit()
-        self.session.refresh(db_beneficiary)
-        return db_beneficiary
+    async def copy_batch(self, *, beneficiaries: list[Beneficiary]) -> None:
+        """
+        Carga el lote con COPY sobre la conexión de la sesión (misma transacción).
+        Cualquier error de la base (duplicado concurrente, dato inválido) aborta
+        el lote completo; el llamador debe envolverlo en un savepoint.
+        """
+        columns = [column.name for column in Beneficiary.__table__.columns]
+        records = [
+            tuple(getattr(beneficiary, column) for column in columns)
+            for beneficiary in beneficiaries
+        ]
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            Beneficiary.__tablename__, records=records, columns=columns
+        )
 
-    def delete(self, *, db_beneficiary: Beneficiary):
-        self.session.delete(db_beneficiary)
-        self.session.commit()
-        return True
+    async def insert_ignoring_duplicate(self, *, beneficiary: Beneficiary) -> bool:
+        statement = (
+            insert(Beneficiary)
+            .values(**beneficiary.model_dump())
+            .on_conflict_do_nothing(index_elements=[Beneficiary.number_document])
+            .returning(Beneficiary.id)
+        )
+        return (await self.session.exec(statement)).first() is not None
+
+    async def stream_export(self, *, filters: BeneficiaryFilters | None = None) -> AsyncIterator[dict]:
+        # Columnas planas (sin entidades ORM ni relaciones) leídas con un cursor
+        # del lado del servidor: la memoria no depende del tamaño de la tabla
+        statement = (
+            select(*Beneficiary.__table__.columns)
+            .order_by(Beneficiary.created_at, Beneficiary.id)
+            .execution_options(yield_per=1000)
+        )
+        if filters is not None:
+            statement = self._apply_filters(statement, filters)
+
+        result = await self.session.stream(statement)
+        async for row in result.mappings():
+            yield dict(row)
+
+    @staticmethod
+    def _apply_filters(statement, filters: BeneficiaryFilters):
+        # Grado, grupo étnico, discapacidad, víctima y retirado tienen un índice que
+        # los combina con el orden (created_at, id) (ver __table_args__ de
+        # Beneficiary y tests/test_beneficiary_filters.py); los demás filtros se
+        # evalúan sobre el recorrido de ix_beneficiary_created_at_id
+        if filters.grade_id is not None:
+            statement = statement.where(Beneficiary.grade_id == filters.grade_id)
+        if filters.gender_id is not None:
+            statement = statement.where(Beneficiary.gender_id == filters.gender_id)
+        if filters.etnic_group_id is not None:
+            statement = statement.where(Beneficiary.etnic_group_id == filters.etnic_group_id)
+        if filters.disability_type_id is not None:
+            statement = statement.where(Beneficiary.disability_type_id == filters.disability_type_id)
+        if filters.victim_conflict is not None:
+            # Forma literal (no "= :param") para que el planner use el índice parcial
+            statement = statement.where(Beneficiary.victim_conflict if filters.victim_conflict else Beneficiary.victim_conflict.isnot(True))
+        if filters.birth_date_from is not None:
+            statement = statement.where(Beneficiary.birth_date >= filters.birth_date_from)
+        if filters.birth_date_to is not None:
+            statement = statement.where(Beneficiary.birth_date <= filters.birth_date_to)
+        if filters.retired is not None:
+            statement = statement.where(
+                Beneficiary.retirement_date.isnot(None) if filters.retired else Beneficiary.retirement_date.is_(None)
+            )
+        if filters.campus_id is not None or filters.town_id is not None:
+            # EXISTS en vez de JOIN: un beneficiario con varias coberturas sale una sola vez
+            coverage = select(Coverage.id).where(Coverage.beneficiary_id == Beneficiary.id)
+            if filters.campus_id is not None:
+                coverage = coverage.where(Coverage.campus_id == filters.campus_id)
+            if filters.town_id is not None:
+                coverage = (
+                    coverage
+                    .join(Campus, Coverage.campus_id == Campus.id)
+                    .join(Institution, Campus.institution_id == Institution.id)
+                    .where(Institution.town_id == filters.town_id)
+                )
+            statement = statement.where(coverage.exists())
+        return statement
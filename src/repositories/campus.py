@@ -1,124 +1,93 @@
 from datetime import datetime
-from sqlmodel import Session, select, func
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from core.db_errors import raise_for_constraint
 from models.campus import Campus
 from models.coverage import Coverage
 from schemas.campus import CampusCreate, CampusUpdate
 
+# Índice único / llave foránea -> mensaje (los de las antiguas validaciones del servicio)
+CAMPUS_CONSTRAINT_MESSAGES = {
+    "ix_campus_dane_code": "A campus with DANE code {dane_code} already exists.",
+    "ix_campus_name": "A campus with name {name} already exists.",
+    "campus_institution_id_fkey": "Institution with id {institution_id} does not exist",
+}
+
 class CampusRepository:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def create(self, *, campus_in: CampusCreate) -> dict:
-        db_campus = Campus.model_validate(campus_in)
-        self.session.add(db_campus)
-        self.session.commit()
-        self.session.refresh(db_campus)
+    async def create(self, *, campus_in: CampusCreate) -> dict:
+        values = Campus.model_validate(campus_in).model_dump(exclude={"id"})
+        statement = insert(Campus).values(**values).returning(Campus)
+        try:
+            db_campus = (await self.session.exec(statement)).scalar_one()
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise_for_constraint(e, CAMPUS_CONSTRAINT_MESSAGES, values)
 
-        campus_dict = db_campus.model_dump()
-        campus_dict["number_of_coverages"] = 0
+        return db_campus.model_dump()
 
-        return campus_dict
-
-    def get_by_id(self, *, campus_id: int) -> dict | None:
-        campus = self.session.get(Campus, campus_id)
+    async def get_by_id(self, *, campus_id: int) -> dict | None:
+        campus = await self.session.get(Campus, campus_id)
         if not campus:
             return None
 
-        statement = (
-            select(func.count(Coverage.id))
-            .where(Coverage.campus_id == campus_id)
-        )
-        coverage_count = self.session.exec(statement).first()
-
-        campus_dict = campus.model_dump()
-        campus_dict["number_of_coverages"] = coverage_count or 0
-
-        return campus_dict
-
-    def get_all(self, *, skip: int = 0, limit: int = 100) -> list[dict]:
-        coverage_count_sq = (
-            select(
-                Coverage.campus_id,
-                func.count(Coverage.id).label("coverage_count")
-            )
-            .group_by(Coverage.campus_id)
-            .subquery()
-        )
+        return campus.model_dump()
 
+    async def get_all(self, *, skip: int = 0, limit: int = 100) -> list[dict]:
         statement = (
-            select(
-                Campus.id,
-                Campus.dane_code,
-                Campus.name,
-                Campus.address,
-                Campus.latitude,
-                Campus.longitude,
-                Campus.created_at,
-                Campus.updated_at,
-                Campus.institution_id,
-                func.coalesce(coverage_count_sq.c.coverage_count, 0).label("number_of_coverages")
-            )
-            .outerjoin(coverage_count_sq, Campus.id == coverage_count_sq.c.campus_id)
+            select(Campus)
             .order_by(Campus.name)
             .offset(skip)
             .limit(limit)
         )
 
-        result = self.session.exec(statement).mappings().all()
-        return result
+        campuses = (await self.session.exec(statement)).all()
+        return [campus.model_dump() for campus in campuses]
 
-    def update(self, *, db_campus: Campus, campus_in: CampusUpdate) -> dict:
+    async def update(self, *, campus_id: int, campus_in: CampusUpdate) -> dict | None:
         update_data = campus_in.model_dump(exclude_unset=True)
         if 'dane_code' in update_data:
             del update_data['dane_code']
 
-        for key, value in update_data.items():
-            setattr(db_campus, key, value)
-
-        db_campus.updated_at = datetime.now()
-        self.session.add(db_campus)
-        self.session.commit()
-        self.session.refresh(db_campus)
-
         statement = (
-            select(func.count(Coverage.id))
-            .where(Coverage.campus_id == db_campus.id)
+            update(Campus)
+            .where(Campus.id == campus_id)
+            .values(**update_data, updated_at=datetime.now())
+            .returning(Campus)
         )
-        coverage_count = self.session.exec(statement).first()
+        try:
+            db_campus = (await self.session.exec(statement)).scalar_one_or_none()
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise_for_constraint(e, CAMPUS_CONSTRAINT_MESSAGES, update_data)
 
-        campus_dict = db_campus.model_dump()
-        campus_dict["number_of_coverages"] = coverage_count or 0
+        return db_campus.model_dump() if db_campus is not None else None
 
-        return campus_dict
-
-    def delete(self, *, db_campus: Campus):
+    async def delete(self, *, db_campus: Campus):
         statement = select(func.count(Coverage.id)).where(Coverage.campus_id == db_campus.id)
-        coverage_count = self.session.exec(statement).first()
+        coverage_count = (await self.session.exec(statement)).first()
 
         if coverage_count > 0:
             raise ValueError(f"No se puede eliminar el campus {db_campus.name} porque tiene {coverage_count} coberturas asociadas")
 
-        self.session.delete(db_campus)
-        self.session.commit()
+        await self.session.delete(db_campus)
+        await self.session.commit()
 
-    def get_by_institution(self, *, institution_id: int, skip: int = 0, limit: int = 100) -> list[dict]:
-        campuses = self.session.exec(
+    async def get_by_institution(self, *, institution_id: int, skip: int = 0, limit: int = 100) -> list[dict]:
+        statement = (
             select(Campus)
             .where(Campus.institution_id == institution_id)
             .order_by(Campus.name)
             .offset(skip)
             .limit(limit)
-        ).all()
-
-        campus_dicts = []
-        for campus in campuses:
-            statement = (
-                select(func.count(Coverage.id))
-                .where(Coverage.campus_id == campus.id)
-            )
-            coverage_count = self.session.exec(statement).first()
-            campus_dict = campus.model_dump()
-            campus_dict["number_of_coverages"] = coverage_count or 0
-            campus_dicts.append(campus_dict)
-
-        return campus_dicts
+        )
+
+        campuses = (await self.session.exec(statement)).all()
+        return [campus.model_dump() for campus in campuses]
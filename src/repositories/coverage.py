@@ -1,76 +1,246 @@
 from datetime import datetime
+from typing import AsyncIterator, Optional
 from uuid import UUID
-from sqlmodel import Session, select
-from sqlalchemy.orm import selectinload
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import literal_column, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 
-from models.coverage import Coverage
+from core.db_errors import violated_constraint
+from core.fieldsets import Fieldset
+from core.pagination import Keyset
+from models.benefit_type import BenefitType
+from models.campus import Campus
+from models.coverage import COVERAGE_UNIQUE_CONSTRAINT, Coverage
+from models.beneficiary import Beneficiary
+from models.department import Department
+from models.disability_type import DisabilityType
+from models.etnic_group import EtnicGroup
+from models.gender import Gender
+from models.grade import Grade
+from models.institution import Institution
+from models.town import Town
 from schemas.coverage import CoverageCreate, CoverageUpdate
 
+DUPLICATE_COVERAGE_MESSAGE = "This coverage (beneficiary, benefit type, campus) already exists."
+
 class CoverageRepository:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def create(self, *, coverage_in: CoverageCreate) -> Coverage:
+    async def create(self, *, coverage_in: CoverageCreate) -> Coverage | None:
+        # El índice único decide en la misma sentencia: sin RETURNING es un duplicado
         db_coverage = Coverage.model_validate(coverage_in)
-        self.session.add(db_coverage)
-        self.session.commit()
-        self.session.refresh(db_coverage)
-        return db_coverage
+        statement = (
+            insert(Coverage)
+            .values(**db_coverage.model_dump())
+            .on_conflict_do_nothing(
+                index_elements=[Coverage.beneficiary_id, Coverage.benefit_type_id, Coverage.campus_id]
+            )
+            .returning(Coverage)
+        )
+        created = (await self.session.exec(statement)).scalar_one_or_none()
+        await self.session.commit()
+        return created
 
-    def get_by_id(self, *, coverage_id: UUID) -> Coverage | None:
+    async def upsert_batch(self, *, coverages: list[Coverage]) -> tuple[int, int]:
+        """
+        INSERT ... ON CONFLICT DO UPDATE de varias filas en una sentencia.
+        Solo se actualizan (y se devuelven) las filas cuyo `active` cambia;
+        devuelve (insertadas, actualizadas).
+        """
+        statement = insert(Coverage).values([coverage.model_dump() for coverage in coverages])
         statement = (
-            select(Coverage)
-            .where(Coverage.id == coverage_id)
-            .options(
-                selectinload(Coverage.benefit_type),
-                selectinload(Coverage.campus),
-                selectinload(Coverage.beneficiary)
+            statement
+            .on_conflict_do_update(
+                index_elements=[Coverage.beneficiary_id, Coverage.benefit_type_id, Coverage.campus_id],
+                set_={
+                    "active": statement.excluded.active,
+                    "updated_at": statement.excluded.updated_at,
+                },
+                where=Coverage.active.is_distinct_from(statement.excluded.active),
             )
+            # xmax = 0 solo en filas recién insertadas
+            .returning(literal_column("xmax = 0").label("inserted"))
         )
-        return self.session.exec(statement).first()
+        rows = (await self.session.exec(statement)).all()
+        inserted = sum(1 for row in rows if row.inserted)
+        return inserted, len(rows) - inserted
 
-    def get_all(self, *, skip: int = 0, limit: int = 100) -> list[Coverage]:
+    async def get_by_id(self, *, coverage_id: UUID, fieldset: Fieldset | None = None) -> Coverage | None:
+        statement = select(Coverage).where(Coverage.id == coverage_id)
+        if fieldset is not None:
+            statement = statement.options(*fieldset.load_options(Coverage))
+        return (await self.session.exec(statement)).first()
+
+    async def get_all(
+        self, *, skip: int = 0, limit: int = 100, after: Keyset | None = None, fieldset: Fieldset | None = None
+    ) -> list[Coverage]:
         statement = (
             select(Coverage)
-            .offset(skip)
+            .order_by(Coverage.created_at, Coverage.id)
             .limit(limit)
-            .options(
-                selectinload(Coverage.benefit_type),
-                selectinload(Coverage.campus),
-                selectinload(Coverage.beneficiary)
-            )
         )
-        return self.session.exec(statement).all()
+        if fieldset is not None:
+            statement = statement.options(*fieldset.load_options(Coverage))
+        return (await self.session.exec(self._paginate(statement, skip=skip, after=after))).all()
 
-    def update(
-        self, *, db_coverage: Coverage, coverage_in: CoverageUpdate
-    ) -> Coverage:
+    async def update(
+        self, *, coverage_id: UUID, coverage_in: CoverageUpdate
+    ) -> Coverage | None:
         update_data = coverage_in.model_dump(exclude_unset=True)
-
-        for key, value in update_data.items():
-            setattr(db_coverage, key, value)
-
-        db_coverage.updated_at = datetime.now()
-        self.session.add(db_coverage)
-        self.session.commit()
-        self.session.refresh(db_coverage)
+        statement = (
+            update(Coverage)
+            .where(Coverage.id == coverage_id)
+            .values(**update_data, updated_at=datetime.now())
+            .returning(Coverage)
+        )
+        try:
+            db_coverage = (await self.session.exec(statement)).scalar_one_or_none()
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            if violated_constraint(e) == COVERAGE_UNIQUE_CONSTRAINT:
+                raise ValueError(DUPLICATE_COVERAGE_MESSAGE)
+            raise
         return db_coverage
 
-    def delete(self, *, db_coverage: Coverage):
-        self.session.delete(db_coverage)
-        self.session.commit()
+    async def delete(self, *, db_coverage: Coverage):
+        await self.session.delete(db_coverage)
+        await self.session.commit()
         return True
 
-    def get_by_campus(self, *, campus_id: int, skip: int = 0, limit: int = 100) -> list[Coverage]:
+    async def get_by_campus(
+        self,
+        *,
+        campus_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Keyset | None = None,
+        fieldset: Fieldset | None = None,
+    ) -> list[Coverage]:
         statement = (
             select(Coverage)
             .where(Coverage.campus_id == campus_id)
-            .offset(skip)
+            .order_by(Coverage.created_at, Coverage.id)
             .limit(limit)
-            .options(
-                selectinload(Coverage.benefit_type),
-                selectinload(Coverage.campus),
-                selectinload(Coverage.beneficiary)
+        )
+        if fieldset is not None:
+            statement = statement.options(*fieldset.load_options(Coverage))
+        return (await self.session.exec(self._paginate(statement, skip=skip, after=after))).all()
+
+    async def stream_rollup(
+        self,
+        *,
+        department_id: Optional[int] = None,
+        town_id: Optional[int] = None,
+        institution_id: Optional[int] = None,
+        campus_id: Optional[int] = None,
+    ) -> AsyncIterator[dict]:
+        # GROUPING devuelve un bit por nivel agregado (departamento, municipio,
+        # institución, sede): 0 = fila de sede ... 15 = total nacional
+        grouping = func.grouping(Department.id, Town.id, Institution.id, Campus.id)
+        statement = (
+            select(
+                grouping.label("grouping"),
+                Department.id.label("department_id"),
+                Department.name.label("department_name"),
+                Town.id.label("town_id"),
+                Town.name.label("town_name"),
+                Institution.id.label("institution_id"),
+                Institution.name.label("institution_name"),
+                Campus.id.label("campus_id"),
+                Campus.name.label("campus_name"),
+                BenefitType.id.label("benefit_type_id"),
+                BenefitType.name.label("benefit_type_name"),
+                func.count(Coverage.id).label("coverages"),
+            )
+            .select_from(Coverage)
+            .join(Campus, Coverage.campus_id == Campus.id)
+            .join(Institution, Campus.institution_id == Institution.id)
+            .join(Town, Institution.town_id == Town.id)
+            .join(Department, Town.department_id == Department.id)
+            .join(BenefitType, Coverage.benefit_type_id == BenefitType.id)
+            .group_by(
+                BenefitType.id,
+                BenefitType.name,
+                func.rollup(
+                    tuple_(Department.id, Department.name),
+                    tuple_(Town.id, Town.name),
+                    tuple_(Institution.id, Institution.name),
+                    tuple_(Campus.id, Campus.name),
+                ),
             )
+            .order_by(
+                Department.name.nulls_first(),
+                Town.name.nulls_first(),
+                Institution.name.nulls_first(),
+                Campus.name.nulls_first(),
+                BenefitType.name,
+            )
+            .execution_options(yield_per=500)
         )
-        return self.session.exec(statement).all()
+
+        if department_id is not None:
+            statement = statement.where(Department.id == department_id)
+        if town_id is not None:
+            statement = statement.where(Town.id == town_id)
+        if institution_id is not None:
+            statement = statement.where(Institution.id == institution_id)
+        if campus_id is not None:
+            statement = statement.where(Campus.id == campus_id)
+
+        result = await self.session.stream(statement)
+        async for row in result.mappings():
+            yield dict(row)
+
+    async def stream_fact_batches(self, *, batch_size: int) -> AsyncIterator[list[dict]]:
+        # Tabla de hechos para analítica: cobertura + demografía del beneficiario +
+        # geografía. Sin nombres ni documento del beneficiario (datos personales)
+        statement = (
+            select(
+                Coverage.id.label("coverage_id"),
+                Coverage.active,
+                Coverage.created_at.label("coverage_created_at"),
+                BenefitType.name.label("benefit_type"),
+                Coverage.beneficiary_id,
+                Beneficiary.birth_date,
+                Gender.name.label("gender"),
+                Grade.name.label("grade"),
+                EtnicGroup.name.label("etnic_group"),
+                DisabilityType.name.label("disability_type"),
+                Beneficiary.victim_conflict,
+                Campus.id.label("campus_id"),
+                Campus.name.label("campus"),
+                Institution.id.label("institution_id"),
+                Institution.name.label("institution"),
+                Town.id.label("town_id"),
+                Town.name.label("town"),
+                Department.id.label("department_id"),
+                Department.name.label("department"),
+            )
+            .select_from(Coverage)
+            .join(BenefitType, Coverage.benefit_type_id == BenefitType.id)
+            .join(Beneficiary, Coverage.beneficiary_id == Beneficiary.id)
+            .join(Gender, Beneficiary.gender_id == Gender.id)
+            .join(Grade, Beneficiary.grade_id == Grade.id)
+            .outerjoin(EtnicGroup, Beneficiary.etnic_group_id == EtnicGroup.id)
+            .outerjoin(DisabilityType, Beneficiary.disability_type_id == DisabilityType.id)
+            .join(Campus, Coverage.campus_id == Campus.id)
+            .join(Institution, Campus.institution_id == Institution.id)
+            .join(Town, Institution.town_id == Town.id)
+            .join(Department, Town.department_id == Department.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        result = await self.session.stream(statement)
+        async for partition in result.mappings().partitions(batch_size):
+            yield [dict(row) for row in partition]
+
+    @staticmethod
+    def _paginate(statement, *, skip: int, after: Keyset | None):
+        # Keyset: con cursor se continúa después del último (created_at, id) visto
+        if after is not None:
+            return statement.where(tuple_(Coverage.created_at, Coverage.id) > tuple_(*after))
+        return statement.offset(skip)
@@ -1,98 +1,80 @@
 from datetime import datetime
-from sqlmodel import Session, select, func
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from core.db_errors import raise_for_constraint
 from models.department import Department
 from models.town import Town
 from schemas.departments import DepartmentCreate, DepartmentUpdate
 
+# Índice único / llave foránea -> mensaje (los de las antiguas validaciones del servicio)
+DEPARTMENT_CONSTRAINT_MESSAGES = {
+    "ix_department_dane_code": "A department with DANE code {dane_code} already exists.",
+    "ix_department_name": "A department with name {name} already exists.",
+}
+
 class DepartmentRepository:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def create(self, *, department_in: DepartmentCreate) -> dict:
-        db_department = Department.model_validate(department_in)
-        self.session.add(db_department)
-        self.session.commit()
-        self.session.refresh(db_department)
-
-        department_dict = db_department.model_dump()
-        department_dict["number_of_towns"] = 0
+    async def create(self, *, department_in: DepartmentCreate) -> dict:
+        values = Department.model_validate(department_in).model_dump(exclude={"id"})
+        statement = insert(Department).values(**values).returning(Department)
+        try:
+            db_department = (await self.session.exec(statement)).scalar_one()
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise_for_constraint(e, DEPARTMENT_CONSTRAINT_MESSAGES, values)
 
-        return department_dict
+        return db_department.model_dump()
 
-    def get_by_id(self, *, department_id: int) -> dict | None:
-        department = self.session.get(Department, department_id)
+    async def get_by_id(self, *, department_id: int) -> dict | None:
+        department = await self.session.get(Department, department_id)
         if not department:
             return None
 
-        statement = (
-            select(func.count(Town.id))
-            .where(Town.department_id == department_id)
-        )
-        town_count = self.session.exec(statement).first()
-
-        department_dict = department.model_dump()
-        department_dict["number_of_towns"] = town_count or 0
-
-        return department_dict
-
-    def get_all(self, *, skip: int = 0, limit: int = 100) -> list[dict]:
-        town_count = (
-            select(
-                Town.department_id,
-                func.count(Town.id).label("town_count")
-            )
-            .group_by(Town.department_id)
-            .subquery()
-        )
+        return department.model_dump()
 
+    async def get_all(self, *, skip: int = 0, limit: int = 100) -> list[dict]:
         statement = (
-            select(
-                Department.id,
-                Department.dane_code,
-                Department.name,
-                Department.created_at,
-                Department.updated_at,
-                func.coalesce(town_count.c.town_count, 0).label("number_of_towns")
-            )
-            .outerjoin(town_count, Department.id == town_count.c.department_id)
+            select(Department)
             .order_by(Department.name)
             .offset(skip)
             .limit(limit)
         )
 
-        result = self.session.exec(statement).mappings().all()
-        return result
+        departments = (await self.session.exec(statement)).all()
+        return [department.model_dump() for department in departments]
 
-    def update(self, *, db_department: Department, department_in: DepartmentUpdate) -> dict:
+    async def update(self, *, department_id: int, department_in: DepartmentUpdate) -> dict | None:
         update_data = department_in.model_dump(exclude_unset=True)
         if 'dane_code' in update_data:
             del update_data['dane_code']
 
-        for key, value in update_data.items():
-            setattr(db_department, key, value)
-
-        db_department.updated_at = datetime.now()
-        self.session.add(db_department)
-        self.session.commit()
-        self.session.refresh(db_department)
-
         statement = (
-            select(func.count(Town.id))
-            .where(Town.department_id == db_department.id)
+            update(Department)
+            .where(Department.id == department_id)
+            .values(**update_data, updated_at=datetime.now())
+            .returning(Department)
         )
-        town_count = self.session.exec(statement).first()
-
-        department_dict = db_department.model_dump()
-        department_dict["number_of_towns"] = town_count or 0
+        try:
+            db_department = (await self.session.exec(statement)).scalar_one_or_none()
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise_for_constraint(e, DEPARTMENT_CONSTRAINT_MESSAGES, update_data)
 
-        return department_dict
+        return db_department.model_dump() if db_department is not None else None
 
-    def delete(self, *, db_department: Department):
+    async def delete(self, *, db_department: Department):
         statement = select(func.count(Town.id)).where(Town.department_id == db_department.id)
-        town_count = self.session.exec(statement).first()
+        town_count = (await self.session.exec(statement)).first()
 
         if town_count > 0:
             raise ValueError(f"No se puede eliminar el departamento {db_department.name} porque tiene {town_count} municipios asociados")
 
-        self.session.delete(db_department)
-        self.session.commit()
+        await self.session.delete(db_department)
+        await self.session.commit()
@@ -1,121 +1,93 @@
 from datetime import datetime
-from sqlmodel import Session, select, func
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from core.db_errors import raise_for_constraint
 from models.town import Town
 from models.institution import Institution
 from schemas.towns import TownCreate, TownUpdate
 
+# Índice único / llave foránea -> mensaje (los de las antiguas validaciones del servicio)
+TOWN_CONSTRAINT_MESSAGES = {
+    "ix_town_dane_code": "A town with DANE code {dane_code} already exists.",
+    "ix_town_name": "A town with name {name} already exists.",
+    "town_department_id_fkey": "Department with id {department_id} does not exist",
+}
+
 class TownRepository:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def create(self, *, town_in: TownCreate) -> dict:
-        db_town = Town.model_validate(town_in)
-        self.session.add(db_town)
-        self.session.commit()
-        self.session.refresh(db_town)
+    async def create(self, *, town_in: TownCreate) -> dict:
+        values = Town.model_validate(town_in).model_dump(exclude={"id"})
+        statement = insert(Town).values(**values).returning(Town)
+        try:
+            db_town = (await self.session.exec(statement)).scalar_one()
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise_for_constraint(e, TOWN_CONSTRAINT_MESSAGES, values)
 
-        town_dict = db_town.model_dump()
-        town_dict["number_of_institutions"] = 0
+        return db_town.model_dump()
 
-        return town_dict
-
-    def get_by_id(self, *, town_id: int) -> dict | None:
-        town = self.session.get(Town, town_id)
+    async def get_by_id(self, *, town_id: int) -> dict | None:
+        town = await self.session.get(Town, town_id)
         if not town:
             return None
 
-        statement = (
-            select(func.count(Institution.id))
-            .where(Institution.town_id == town_id)
-        )
-        institution_count = self.session.exec(statement).first()
-
-        town_dict = town.model_dump()
-        town_dict["number_of_institutions"] = institution_count or 0
-
-        return town_dict
-
-    def get_all(self, *, skip: int = 0, limit: int = 100) -> list[dict]:
-        institution_count = (
-            select(
-                Institution.town_id,
-                func.count(Institution.id).label("institution_count")
-            )
-            .group_by(Institution.town_id)
-            .subquery()
-        )
+        return town.model_dump()
 
+    async def get_all(self, *, skip: int = 0, limit: int = 100) -> list[dict]:
         statement = (
-            select(
-                Town.id,
-                Town.dane_code,
-                Town.name,
-                Town.created_at,
-                Town.updated_at,
-                Town.department_id,
-                func.coalesce(institution_count.c.institution_count, 0).label("number_of_institutions")
-            )
-            .outerjoin(institution_count, Town.id == institution_count.c.town_id)
+            select(Town)
             .order_by(Town.name)
             .offset(skip)
             .limit(limit)
         )
 
-        result = self.session.exec(statement).mappings().all()
-        return result
+        towns = (await self.session.exec(statement)).all()
+        return [town.model_dump() for town in towns]
 
-    def update(self, *, db_town: Town, town_in: TownUpdate) -> dict:
+    async def update(self, *, town_id: int, town_in: TownUpdate) -> dict | None:
         update_data = town_in.model_dump(exclude_unset=True)
         if 'dane_code' in update_data:
             del update_data['dane_code']
 
-        for key, value in update_data.items():
-            setattr(db_town, key, value)
-
-        db_town.updated_at = datetime.now()
-        self.session.add(db_town)
-        self.session.commit()
-        self.session.refresh(db_town)
-
         statement = (
-            select(func.count(Institution.id))
-            .where(Institution.town_id == db_town.id)
+            update(Town)
+            .where(Town.id == town_id)
+            .values(**update_data, updated_at=datetime.now())
+            .returning(Town)
         )
-        institution_count = self.session.exec(statement).first()
+        try:
+            db_town = (await self.session.exec(statement)).scalar_one_or_none()
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise_for_constraint(e, TOWN_CONSTRAINT_MESSAGES, update_data)
 
-        town_dict = db_town.model_dump()
-        town_dict["number_of_institutions"] = institution_count or 0
+        return db_town.model_dump() if db_town is not None else None
 
-        return town_dict
-
-    def delete(self, *, db_town: Town):
+    async def delete(self, *, db_town: Town):
         statement = select(func.count(Institution.id)).where(Institution.town_id == db_town.id)
-        institution_count = self.session.exec(statement).first()
+        institution_count = (await self.session.exec(statement)).first()
 
         if institution_count > 0:
             raise ValueError(f"No se puede eliminar el municipio {db_town.name} porque tiene {institution_count} instituciones asociadas")
 
-        self.session.delete(db_town)
-        self.session.commit()
+        await self.session.delete(db_town)
+        await self.session.commit()
 
-    def get_by_department(self, *, department_id: int, skip: int = 0, limit: int = 100) -> list[dict]:
-        towns = self.session.exec(
+    async def get_by_department(self, *, department_id: int, skip: int = 0, limit: int = 100) -> list[dict]:
+        statement = (
             select(Town)
             .where(Town.department_id == department_id)
             .order_by(Town.name)
             .offset(skip)
             .limit(limit)
-        ).all()
-
-        town_dicts = []
-        for town in towns:
-            statement = (
-                select(func.count(Institution.id))
-                .where(Institution.town_id == town.id)
-            )
-            institution_count = self.session.exec(statement).first()
-            town_dict = town.model_dump()
-            town_dict["number_of_institutions"] = institution_count or 0
-            town_dicts.append(town_dict)
-
-        return town_dicts
+        )
+
+        towns = (await self.session.exec(statement)).all()
+        return [town.model_dump() for town in towns]
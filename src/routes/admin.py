@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Query, status
+from core.slow_query_log import slow_query_log
+import logging
+from core.dependencies import require_admin
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+)
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: dict = Depends(require_admin()),
+):
+    logging.info(f"Getting slow queries: {limit}")
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "entries": slow_query_log.entries(limit=limit),
+    }
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(current_user: dict = Depends(require_admin())):
+    logging.info("Clearing slow queries")
+    slow_query_log.clear()
+    return
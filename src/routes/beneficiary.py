@@ -1,16 +1,28 @@
-from typing import List
+from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from database import get_session
+from core.fieldsets import Fieldset, fieldset
+from core.import_jobs import import_jobs
+from core.pagination import InvalidCursorError, set_next_cursor
+from core.streaming import stream_csv, stream_ndjson
+from database import get_async_session, stream_with_session
+from models.beneficiary import Beneficiary
 from schemas.beneficiary import (
+    BENEFICIARY_EXPANSIONS,
+    BENEFICIARY_FIELDS,
+    BeneficiaryBulkResult,
+    BeneficiarySearchResult,
     BeneficiaryCreate,
+    BeneficiaryFieldsRead,
+    BeneficiaryFilters,
     BeneficiaryRead,
     BeneficiaryUpdate,
-    BeneficiaryReadWithDetails,
 )
 from services.beneficiary import BeneficiaryService
+from services.beneficiary_import import start_beneficiary_import
 import logging
 from core.dependencies import require_create, require_read, require_update, require_delete, require_list
 
@@ -19,65 +31,163 @@ router = APIRouter(
     tags=["Beneficiaries"],
 )
 
+beneficiary_fieldset = fieldset(BENEFICIARY_FIELDS, BENEFICIARY_EXPANSIONS)
+# El detalle siempre incluyó todas las relaciones: se mantienen por omisión
+beneficiary_detail_fieldset = fieldset(BENEFICIARY_FIELDS, BENEFICIARY_EXPANSIONS, default_expand=BENEFICIARY_EXPANSIONS)
+
 @router.post("/", response_model=BeneficiaryRead)
-def create_beneficiary(
+async def create_beneficiary(
     beneficiary_in: BeneficiaryCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_create()),
 ):
     service = BeneficiaryService(session)
     try:
         logging.info(f"Creating beneficiary: {beneficiary_in}")
-        return service.create_beneficiary(beneficiary_in)
+        return await service.create_beneficiary(beneficiary_in)
     except ValueError as e:
         logging.error(f"Error creating beneficiary: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/{beneficiary_id}", response_model=BeneficiaryReadWithDetails)
-def get_beneficiary(
+@router.post("/bulk", response_model=BeneficiaryBulkResult)
+async def bulk_create_beneficiaries(
+    # Cada elemento es un BeneficiaryCreate; se valida fila por fila para que una
+    # fila inválida se reporte en los resultados sin rechazar toda la carga
+    rows: List[Dict[str, Any]] = Body(...),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: dict = Depends(require_create()),
+):
+    service = BeneficiaryService(session)
+    try:
+        logging.info(f"Bulk creating beneficiaries: {len(rows)} rows")
+        return await service.bulk_create_beneficiaries(rows)
+    except ValueError as e:
+        logging.error(f"Error bulk creating beneficiaries: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/import", status_code=status.HTTP_202_ACCEPTED)
+async def import_beneficiaries(
+    file: UploadFile = File(..., description="Archivo CSV o XLSX con una fila de encabezados"),
+    current_user: dict = Depends(require_create()),
+):
+    logging.info(f"Importing beneficiaries from file: {file.filename}")
+    try:
+        job = await start_beneficiary_import(file)
+    except ValueError as e:
+        logging.error(f"Error importing beneficiaries: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.to_dict(include_errors=False)
+
+@router.get("/import/{job_id}")
+async def get_beneficiary_import(
+    job_id: str,
+    include_errors: bool = Query(True),
+    current_user: dict = Depends(require_read()),
+):
+    logging.info(f"Getting beneficiary import job: {job_id}")
+    job = import_jobs.get(job_id)
+    if not job:
+        logging.error(f"Import job not found: {job_id}")
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.to_dict(include_errors=include_errors)
+
+# Debe declararse antes de "/{beneficiary_id}" para que "search" no se tome como un id
+@router.get("/search", response_model=List[BeneficiarySearchResult])
+async def search_beneficiaries(
+    q: str = Query(..., min_length=3, max_length=100, description="Nombre parcial; no distingue tildes ni mayúsculas"),
+    limit: int = Query(10, ge=1, le=50),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: dict = Depends(require_list()),
+):
+    service = BeneficiaryService(session)
+    logging.info(f"Searching beneficiaries: {q}, {limit}")
+    try:
+        return await service.search_beneficiaries(q, limit=limit)
+    except TimeoutError as e:
+        logging.error(f"Error searching beneficiaries: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+
+# Debe declararse antes de "/{beneficiary_id}" para que "export" no se tome como un id
+@router.get("/export", response_class=StreamingResponse)
+async def export_beneficiaries(
+    request: Request,
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    filters: BeneficiaryFilters = Depends(),
+    current_user: dict = Depends(require_list()),
+):
+    logging.info(f"Exporting beneficiaries: {format}, {filters}")
+    rows = stream_with_session(request, lambda session: BeneficiaryService(session).stream_export(filters))
+    if format == "csv":
+        body = stream_csv(rows, list(Beneficiary.__table__.columns.keys()))
+        media_type = "text/csv"
+    else:
+        body = stream_ndjson(rows)
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="beneficiaries.{format}"'},
+    )
+
+# La respuesta depende de fields/expand: exclude_unset omite lo que no se pidió
+@router.get("/{beneficiary_id}", response_model=BeneficiaryFieldsRead, response_model_exclude_unset=True)
+async def get_beneficiary(
     beneficiary_id: UUID,
-    session: Session = Depends(get_session),
+    fields: Fieldset = Depends(beneficiary_detail_fieldset),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_read()),
 ):
     service = BeneficiaryService(session)
-    logging.info(f"Getting beneficiary: {beneficiary_id}")
-    beneficiary = service.get_beneficiary(beneficiary_id)
+    logging.info(f"Getting beneficiary: {beneficiary_id}, {fields}")
+    beneficiary = await service.get_beneficiary(beneficiary_id, fieldset=fields)
     if not beneficiary:
         logging.error(f"Beneficiary not found: {beneficiary_id}")
         raise HTTPException(status_code=404, detail="Beneficiary not found")
-    return beneficiary
+    return fields.serialize(beneficiary)
 
-@router.get("/", response_model=List[BeneficiaryRead])
-def get_beneficiaries(
+@router.get("/", response_model=List[BeneficiaryFieldsRead], response_model_exclude_unset=True)
+async def get_beneficiaries(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10000, ge=1, le=10000),
-    session: Session = Depends(get_session),
+    cursor: Optional[str] = Query(None, description="Cursor opaco del header X-Next-Cursor; reemplaza a skip. Enviar los mismos filtros de la primera página"),
+    filters: BeneficiaryFilters = Depends(),
+    fields: Fieldset = Depends(beneficiary_fieldset),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_list()),
 ):
     service = BeneficiaryService(session)
-    logging.info(f"Getting beneficiaries: {skip}, {limit}")
-    return service.get_beneficiaries(skip=skip, limit=limit)
+    logging.info(f"Getting beneficiaries: {skip}, {limit}, {cursor}, {filters}, {fields}")
+    try:
+        beneficiaries = await service.get_beneficiaries(
+            skip=skip, limit=limit, cursor=cursor, filters=filters, fieldset=fields
+        )
+    except InvalidCursorError as e:
+        logging.error(f"Error getting beneficiaries: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, beneficiaries, limit)
+    return [fields.serialize(beneficiary) for beneficiary in beneficiaries]
 
 @router.put("/{beneficiary_id}", response_model=BeneficiaryRead)
-def update_beneficiary(
+async def update_beneficiary(
     beneficiary_id: UUID,
     beneficiary_in: BeneficiaryUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_update()),
 ):
     service = BeneficiaryService(session)
     try:
         logging.info(f"Updating beneficiary: {beneficiary_id}")
-        return service.update_beneficiary(beneficiary_id, beneficiary_in)
+        return await service.update_beneficiary(beneficiary_id, beneficiary_in)
     except ValueError as e:
         logging.error(f"Error updating beneficiary: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.patch("/{beneficiary_id}", response_model=BeneficiaryRead)
-def patch_beneficiary(
+async def patch_beneficiary(
     beneficiary_id: UUID,
     beneficiary_in: BeneficiaryUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_update()),
 ):
     service = BeneficiaryService(session)
@@ -85,21 +195,21 @@ def patch_beneficiary(
         # The service's update method handles partial updates,
         # as the Pydantic model excludes unset values.
         logging.info(f"Patching beneficiary: {beneficiary_id}")
-        return service.update_beneficiary(beneficiary_id, beneficiary_in)
+        return await service.update_beneficiary(beneficiary_id, beneficiary_in)
     except ValueError as e:
         logging.error(f"Error patching beneficiary: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{beneficiary_id}")
-def delete_beneficiary(
+async def delete_beneficiary(
     beneficiary_id: UUID,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_delete()),
 ):
     service = BeneficiaryService(session)
     try:
         logging.info(f"Deleting beneficiary: {beneficiary_id}")
-        service.delete_beneficiary(beneficiary_id)
+        await service.delete_beneficiary(beneficiary_id)
         return {"message": "Beneficiary deleted successfully"}
     except ValueError as e:
         logging.error(f"Error deleting beneficiary: {e}")
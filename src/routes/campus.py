@@ -1,9 +1,11 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session
-from database import get_session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+from core.fieldsets import Fieldset, fieldset
+from core.pagination import InvalidCursorError, set_next_cursor
+from database import get_async_session
 from schemas.campus import CampusCreate, CampusUpdate, CampusResponseWithDetails
-from schemas.coverage import CoverageRead as CoverageResponse
+from schemas.coverage import COVERAGE_EXPANSIONS, COVERAGE_FIELDS, CoverageFieldsRead
 from services.campus import CampusService
 import logging
 from core.dependencies import require_create, require_read, require_update, require_delete, require_list
@@ -13,72 +15,84 @@ router = APIRouter(
     tags=["Campuses"],
 )
 
+coverage_fieldset = fieldset(COVERAGE_FIELDS, COVERAGE_EXPANSIONS)
+
 @router.post("/", response_model=CampusResponseWithDetails)
-def create_campus(
+async def create_campus(
     campus_in: CampusCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_create()),
 ):
     service = CampusService(session)
     try:
         logging.info(f"Creating campus: {campus_in}")
-        return service.create_campus(campus_in)
+        return await service.create_campus(campus_in)
     except ValueError as e:
         logging.error(f"Error creating campus: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{campus_id}", response_model=CampusResponseWithDetails)
-def get_campus(
+async def get_campus(
     campus_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_read()),
 ):
     service = CampusService(session)
     logging.info(f"Getting campus: {campus_id}")
-    campus = service.get_campus(campus_id)
+    campus = await service.get_campus(campus_id)
     if not campus:
         logging.error(f"Campus not found: {campus_id}")
         raise HTTPException(status_code=404, detail="Campus not found")
     return campus
 
 @router.get("/", response_model=List[CampusResponseWithDetails])
-def get_campuses(
+async def get_campuses(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_list()),
 ):
     service = CampusService(session)
     logging.info(f"Getting campuses: {skip}, {limit}")
-    return service.get_campuses(skip=skip, limit=limit)
+    return await service.get_campuses(skip=skip, limit=limit)
 
-@router.get("/{campus_id}/coverage", response_model=List[CoverageResponse])
-def get_campus_coverage(
+@router.get("/{campus_id}/coverage", response_model=List[CoverageFieldsRead], response_model_exclude_unset=True)
+async def get_campus_coverage(
     campus_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    session: Session = Depends(get_session),
+    cursor: Optional[str] = Query(None, description="Cursor opaco del header X-Next-Cursor; reemplaza a skip"),
+    fields: Fieldset = Depends(coverage_fieldset),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_list()),
 ):
     service = CampusService(session)
     try:
-        logging.info(f"Getting coverage by campus: {campus_id}, {skip}, {limit}")
-        return service.get_coverage_by_campus(campus_id=campus_id, skip=skip, limit=limit)
+        logging.info(f"Getting coverage by campus: {campus_id}, {skip}, {limit}, {cursor}, {fields}")
+        coverages = await service.get_coverage_by_campus(
+            campus_id=campus_id, skip=skip, limit=limit, cursor=cursor, fieldset=fields
+        )
+        set_next_cursor(response, coverages, limit)
+        return [fields.serialize(coverage) for coverage in coverages]
+    except InvalidCursorError as e:
+        logging.error(f"Error getting coverage by campus: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         logging.error(f"Error getting coverage by campus: {e}")
         raise HTTPException(status_code=404, detail=str(e))
 
 @router.put("/{campus_id}", response_model=CampusResponseWithDetails)
-def update_campus(
+async def update_campus(
     campus_id: int,
     campus_in: CampusUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_update()),
 ):
     service = CampusService(session)
     try:
         logging.info(f"Updating campus: {campus_id}")
-        campus = service.update_campus(campus_id, campus_in)
+        campus = await service.update_campus(campus_id, campus_in)
         if not campus:
             logging.error(f"Campus not found: {campus_id}")
             raise HTTPException(status_code=404, detail="Campus not found")
@@ -88,16 +102,16 @@ def update_campus(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.patch("/{campus_id}", response_model=CampusResponseWithDetails)
-def patch_campus(
+async def patch_campus(
     campus_id: int,
     campus_in: CampusUpdate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_update()),
 ):
     service = CampusService(session)
     try:
         logging.info(f"Patching campus: {campus_id}")
-        campus = service.update_campus(campus_id, campus_in)
+        campus = await service.update_campus(campus_id, campus_in)
         if not campus:
             logging.error(f"Campus not found: {campus_id}")
             raise HTTPException(status_code=404, detail="Campus not found")
@@ -107,15 +121,15 @@ def patch_campus(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{campus_id}")
-def delete_campus(
+async def delete_campus(
     campus_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_delete()),
 ):
     service = CampusService(session)
     try:
         logging.info(f"Deleting campus: {campus_id}")
-        service.delete_campus(campus_id)
+        await service.delete_campus(campus_id)
         return {"message": "Campus deleted successfully"}
     except ValueError as e:
         logging.error(f"Error deleting campus: {e}")
@@ -1,16 +1,28 @@
-from typing import List
+import os
+import tempfile
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from database import get_session
+from core.fieldsets import Fieldset, fieldset
+from core.pagination import InvalidCursorError, set_next_cursor
+from core.streaming import stream_json_array
+from database import get_async_session, stream_with_session
 from schemas.coverage import (
+    COVERAGE_EXPANSIONS,
+    COVERAGE_FIELDS,
+    CoverageBulkResult,
     CoverageCreate,
+    CoverageFieldsRead,
     CoverageRead,
+    CoverageRollupRead,
     CoverageUpdate,
-    CoverageReadWithDetails,
 )
 from services.coverage import CoverageService
+from services.coverage_export import ParquetUnavailableError, export_coverage_parquet
 import logging
 from core.dependencies import require_create, require_read, require_list, require_delete, require_update
 
@@ -19,85 +31,168 @@ router = APIRouter(
     tags=["Coverages"],
 )
 
+coverage_fieldset = fieldset(COVERAGE_FIELDS, COVERAGE_EXPANSIONS)
+
 @router.post("/", response_model=CoverageRead)
-def create_coverage(
+async def create_coverage(
     coverage_in: CoverageCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_create()),
 ):
     logging.info(f"Creating coverage: {coverage_in}")
     service = CoverageService(session)
     try:
-        return service.create_coverage(coverage_in)
+        return await service.create_coverage(coverage_in)
     except ValueError as e:
         logging.error(f"Error creating coverage: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/{coverage_id}", response_model=CoverageReadWithDetails)
-def get_coverage(
+# Debe declararse antes de "/{coverage_id}" para que "rollup" no se tome como un id
+@router.get(
+    "/rollup",
+    response_class=StreamingResponse,
+    responses={200: {"model": List[CoverageRollupRead]}},
+)
+async def get_coverage_rollup(
+    request: Request,
+    department_id: Optional[int] = Query(None),
+    town_id: Optional[int] = Query(None),
+    institution_id: Optional[int] = Query(None),
+    campus_id: Optional[int] = Query(None),
+    current_user: dict = Depends(require_list()),
+):
+    logging.info(f"Getting coverage rollup: {department_id}, {town_id}, {institution_id}, {campus_id}")
+    rows = stream_with_session(
+        request,
+        lambda session: CoverageService(session).stream_rollup(
+            department_id=department_id,
+            town_id=town_id,
+            institution_id=institution_id,
+            campus_id=campus_id,
+        ),
+    )
+    return StreamingResponse(stream_json_array(rows), media_type="application/json")
+
+# Debe declararse antes de "/{coverage_id}" para que "export" no se tome como un id
+@router.get("/export", response_class=FileResponse)
+async def export_coverages(
+    session: AsyncSession = Depends(get_async_session),
+    current_user: dict = Depends(require_list()),
+):
+    logging.info("Exporting coverages to Parquet")
+    # El archivo se arma completo en disco (memoria constante) antes de enviar el
+    # primer byte y se borra tras enviarlo
+    fd, path = tempfile.mkstemp(prefix="coverages-", suffix=".parquet")
+    os.close(fd)
+    try:
+        await export_coverage_parquet(session, path)
+    except ParquetUnavailableError as e:
+        os.remove(path)
+        logging.error(f"Error exporting coverages: {e}")
+        raise HTTPException(status_code=501, detail=str(e))
+    except Exception:
+        os.remove(path)
+        raise
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename="coverages.parquet",
+        background=BackgroundTask(os.remove, path),
+    )
+
+# La respuesta depende de fields/expand: exclude_unset omite lo que no se pidió
+@router.get("/{coverage_id}", response_model=CoverageFieldsRead, response_model_exclude_unset=True)
+async def get_coverage(
     coverage_id: UUID,
-    session: Session = Depends(get_session),
+    fields: Fieldset = Depends(coverage_fieldset),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_read()),
 ):
-    logging.info(f"Getting coverage: {coverage_id}")
+    logging.info(f"Getting coverage: {coverage_id}, {fields}")
     service = CoverageService(session)
-    coverage = service.get_coverage(coverage_id)
+    coverage = await service.get_coverage(coverage_id, fieldset=fields)
     if not coverage:
         logging.error(f"Coverage not found: {coverage_id}")
         raise HTTPException(status_code=404, detail="Coverage not found")
-    return coverage
+    return fields.serialize(coverage)
 
-@router.get("/", response_model=List[CoverageRead])
-def get_all_coverages(
+@router.get("/", response_model=List[CoverageFieldsRead], response_model_exclude_unset=True)
+async def get_all_coverages(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    session: Session = Depends(get_session),
+    cursor: Optional[str] = Query(None, description="Cursor opaco del header X-Next-Cursor; reemplaza a skip"),
+    fields: Fieldset = Depends(coverage_fieldset),
+    session: AsyncSession = Depends(get_async_session),
     current_user: dict = Depends(require_list()),
 ):
-    logging.info(f"Getting all coverages: {skip}, {limit}")
+    logging.info(f"Getting all coverages: {skip}, {limit}, {cursor}, {fields}")
     service = CoverageService(session)
-    return service.get_all_coverages(skip=skip, limit=limit)
+    try:
+        coverages = await service.get_all_coverages(skip=skip, limit=limit, cursor=cursor, fieldset=fields)
+    except InvalidCursorError as e:
+        logging.error(f"Error getting coverages: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, coverages, limit)
+    return [fields.serialize(coverage) for coverage in coverages]
+
+# Debe declararse antes de "/{coverage_id}" para que "bulk" no se tome como un id
+@router.put("/bulk", response_model=CoverageBulkResult)
+async def bulk_upsert_coverages(
+    coverages_in: List[CoverageCreate],
+    current_user: dict = Depends(require_update()),
+    # El upsert también crea coberturas
+    can_create: dict = Depends(require_create()),
+    session: AsyncSession = Depends(get_async_session),
+):
+    logging.info(f"Bulk upserting coverages: {len(coverages_in)} rows")
+    service = CoverageService(session)
+    try:
+        return await service.bulk_upsert_coverages(coverages_in)
+    except ValueError as e:
+        logging.error(f"Error bulk upserting coverages: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{coverage_id}", response_model=CoverageRead)
-def update_coverage(
+async def update_coverage(
     coverage_id: UUID,
     coverage_in: CoverageUpdate,
     current_user: dict = Depends(require_update()),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     logging.info(f"Updating coverage: {coverage_id}")
     service = CoverageService(session)
     try:
-        return service.update_coverage(coverage_id, coverage_in)
+        return await service.update_coverage(coverage_id, coverage_in)
     except ValueError as e:
         logging.error(f"Error updating coverage: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.patch("/{coverage_id}", response_model=CoverageRead)
-def patch_coverage(
+async def patch_coverage(
     coverage_id: UUID,
     coverage_in: CoverageUpdate,
     current_user: dict = Depends(require_update()),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     logging.info(f"Patching coverage: {coverage_id}")
     service = CoverageService(session)
     try:
-        return service.update_coverage(coverage_id, coverage_in)
+        return await service.update_coverage(coverage_id, coverage_in)
     except ValueError as e:
         logging.error(f"Error patching coverage: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{coverage_id}")
-def delete_coverage(
+async def delete_coverage(
     coverage_id: UUID,
     current_user: dict = Depends(require_delete()),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     logging.info(f"Deleting coverage: {coverage_id}")
     service = CoverageService(session)
     try:
-        service.delete_coverage(coverage_id)
+        await service.delete_coverage(coverage_id)
         return {"message": "Coverage deleted successfully"}
     except ValueError as e:
         logging.error(f"Error deleting coverage: {e}")
@@ -3,6 +3,7 @@ from typing import Optional, List
 from uuid import UUID
 from sqlmodel import SQLModel
 
+from core.fieldsets import partial_model
 from models.document_type import DocumentType
 from models.gender import Gender
 from models.grade import Grade
@@ -64,6 +65,50 @@ class BeneficiaryRead(BeneficiaryBase):
     deleted_at: Optional[datetime] = None
 
 
+# Columnas y relaciones que aceptan `fields=` y `expand=` en las lecturas
+BENEFICIARY_FIELDS = tuple(BeneficiaryRead.model_fields)
+BENEFICIARY_EXPANSIONS = ("document_type", "gender", "grade", "etnic_group", "disability_type", "coverage")
+
+
+class BeneficiaryFilters(SQLModel):
+    # Todos los filtros se combinan con AND; campus y municipio se evalúan a
+    # través de las coberturas del beneficiario
+    grade_id: Optional[int] = None
+    gender_id: Optional[int] = None
+    etnic_group_id: Optional[int] = None
+    disability_type_id: Optional[int] = None
+    victim_conflict: Optional[bool] = None
+    birth_date_from: Optional[date] = None
+    birth_date_to: Optional[date] = None
+    retired: Optional[bool] = None
+    campus_id: Optional[int] = None
+    town_id: Optional[int] = None
+
+
+class BeneficiarySearchResult(SQLModel):
+    id: UUID
+    number_document: str
+    first_name: str
+    second_name: Optional[str] = None
+    first_surname: str
+    second_surname: Optional[str] = None
+    similarity: float
+
+
+class BeneficiaryBulkRowResult(SQLModel):
+    index: int
+    number_document: Optional[str] = None
+    status: str  # "created", "duplicate" o "invalid"
+    id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+
+class BeneficiaryBulkResult(SQLModel):
+    created: int
+    failed: int
+    results: List[BeneficiaryBulkRowResult]
+
+
 class BeneficiaryReadWithDetails(BeneficiaryRead):
     document_type: Optional[DocumentType] = None
     gender: Optional[Gender] = None
@@ -74,3 +119,7 @@ class BeneficiaryReadWithDetails(BeneficiaryRead):
 
     class Config:
         from_attributes = True
+
+
+# Respuesta de las lecturas con `fields=` y `expand=` (lista y detalle)
+BeneficiaryFieldsRead = partial_model(BeneficiaryReadWithDetails)
@@ -3,6 +3,11 @@ from typing import Optional
 from uuid import UUID
 from sqlmodel import SQLModel
 
+from core.fieldsets import partial_model
+from models.benefit_type import BenefitType
+from schemas.beneficiary import BeneficiaryRead
+from schemas.campus import CampusResponse
+
 class CoverageBase(SQLModel):
     active: bool = True
     benefit_type_id: int
@@ -24,12 +29,41 @@ class CoverageRead(CoverageBase):
     updated_at: datetime
     deleted_at: Optional[datetime] = None
 
+# Columnas y relaciones que aceptan `fields=` y `expand=` en las lecturas
+COVERAGE_FIELDS = tuple(CoverageRead.model_fields)
+COVERAGE_EXPANSIONS = ("benefit_type", "campus", "beneficiary")
+
+class CoverageBulkResult(SQLModel):
+    inserted: int
+    updated: int
+    unchanged: int
+    # Filas repetidas (misma beneficiary, benefit type y campus) en la petición;
+    # se aplica la última de cada grupo
+    duplicates: int
+
+class CoverageRollupRead(SQLModel):
+    # Los campos de los niveles agregados vienen en null (p. ej. campus_* en una fila "institution")
+    level: str
+    department_id: Optional[int] = None
+    department_name: Optional[str] = None
+    town_id: Optional[int] = None
+    town_name: Optional[str] = None
+    institution_id: Optional[int] = None
+    institution_name: Optional[str] = None
+    campus_id: Optional[int] = None
+    campus_name: Optional[str] = None
+    benefit_type_id: int
+    benefit_type_name: str
+    coverages: int
+
 class CoverageReadWithDetails(CoverageRead):
-    # If relationships need to be shown, they would be defined here.
-    # benefit_type: Optional["BenefitType"] = None
-    # campus: Optional["Campus"] = None
-    # beneficiary: Optional["Beneficiary"] = None
-    pass
+    # Relaciones que se incluyen con `expand=`
+    benefit_type: Optional[BenefitType] = None
+    campus: Optional[CampusResponse] = None
+    beneficiary: Optional[BeneficiaryRead] = None
 
     class Config:
         from_attributes = True
+
+# Respuesta de las lecturas con `fields=` y `expand=` (lista y detalle)
+CoverageFieldsRead = partial_model(CoverageReadWithDetails)
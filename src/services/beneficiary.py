@@ -1,62 +1,62 @@
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 from uuid import UUID
-from sqlmodel import Session, select
+from asyncpg.exceptions import PostgresError, QueryCanceledError
+from pydantic import ValidationError
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from core.config import settings
+from core.fieldsets import Fieldset
+from core.pagination import decode_cursor
+from core.parametric_cache import PARAMETRIC_FIELDS
 from models.beneficiary import Beneficiary
+from models.coverage import Coverage
 from repositories.beneficiary import BeneficiaryRepository
-from schemas.beneficiary import BeneficiaryCreate, BeneficiaryUpdate
+from schemas.beneficiary import BeneficiaryCreate, BeneficiaryFilters, BeneficiaryUpdate
 import logging
 
 class BeneficiaryService:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
         self.repository = BeneficiaryRepository(session)
 
-    def create_beneficiary(self, beneficiary_in: BeneficiaryCreate) -> Beneficiary:
+    async def create_beneficiary(self, beneficiary_in: BeneficiaryCreate) -> Beneficiary:
         logging.info(f"Creating beneficiary: {beneficiary_in}")
-        existing_beneficiary = self.session.exec(
-            select(Beneficiary).where(Beneficiary.number_document == beneficiary_in.number_document)
-        ).first()
+        # El índice único de number_document valida en el mismo INSERT
+        return await self.repository.create(beneficiary_in=beneficiary_in)
 
-        if existing_beneficiary:
-            raise ValueError(f"A beneficiary with document number {beneficiary_in.number_document} already exists.")
-
-        return self.repository.create(beneficiary_in=beneficiary_in)
-
-    def get_beneficiary(self, beneficiary_id: UUID) -> Optional[Beneficiary]:
+    async def get_beneficiary(self, beneficiary_id: UUID, fieldset: Optional[Fieldset] = None) -> Optional[Beneficiary]:
         logging.info(f"Getting beneficiary: {beneficiary_id}")
-        return self.repository.get_by_id(beneficiary_id=beneficiary_id)
+        return await self.repository.get_by_id(beneficiary_id=beneficiary_id, fieldset=fieldset)
 
-    def get_beneficiaries(self, skip: int = 0, limit: int = 100) -> List[Beneficiary]:
-        logging.info(f"Getting beneficiaries: {skip}, {limit}")
-        return self.repository.get_all(skip=skip, limit=limit)
+    async def get_beneficiaries(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        filters: Optional[BeneficiaryFilters] = None,
+        fieldset: Optional[Fieldset] = None,
+    ) -> List[Beneficiary]:
+        logging.info(f"Getting beneficiaries: {skip}, {limit}, {cursor}, {filters}")
+        after = decode_cursor(cursor) if cursor else None
+        return await self.repository.get_all(skip=skip, limit=limit, after=after, filters=filters, fieldset=fieldset)
 
-    def update_beneficiary(
+    async def update_beneficiary(
         self, beneficiary_id: UUID, beneficiary_in: BeneficiaryUpdate
     ) -> Beneficiary:
         logging.info(f"Updating beneficiary: {beneficiary_id}")
-        db_beneficiary = self.session.get(Beneficiary, beneficiary_id)
-        if not db_beneficiary:
-            raise ValueError(f"Beneficiary with id {beneficiary_id} not found")
-
-        if beneficiary_in.number_document is not None:
-            existing_beneficiary = self.session.exec(
-                select(Beneficiary)
-                .where(Beneficiary.number_document == beneficiary_in.number_document)
-                .where(Beneficiary.id != beneficiary_id)
-            ).first()
-            if existing_beneficiary:
-                raise ValueError(
-                    f"A beneficiary with document number {beneficiary_in.number_document} already exists."
-                )
-
-        return self.repository.update(
-            db_beneficiary=db_beneficiary, beneficiary_in=beneficiary_in
+        # Un solo UPDATE ... RETURNING: sin fila es que el beneficiario no existe
+        beneficiary = await self.repository.update(
+            beneficiary_id=beneficiary_id, beneficiary_in=beneficiary_in
         )
+        if beneficiary is None:
+            raise ValueError(f"Beneficiary with id {beneficiary_id} not found")
+        return beneficiary
 
-    def delete_beneficiary(self, beneficiary_id: UUID):
+    async def delete_beneficiary(self, beneficiary_id: UUID):
         logging.info(f"Deleting beneficiary: {beneficiary_id}")
-        db_beneficiary = self.session.get(Beneficiary, beneficiary_id)
+        db_beneficiary = await self.session.get(Beneficiary, beneficiary_id)
         if not db_beneficiary:
             logging.error(f"Beneficiary with id {beneficiary_id} not found")
             raise ValueError(f"Beneficiary with id {beneficiary_id} not found")
@@ -66,9 +66,124 @@ class BeneficiaryService:
         # If soft delete is needed, repository should be changed.
 
         # Before deleting, check for related coverages
-        if db_beneficiary.coverage:
+        # (explicit query: relationships cannot be lazy-loaded on an AsyncSession)
+        has_coverage = (await self.session.exec(
+            select(Coverage.id).where(Coverage.beneficiary_id == beneficiary_id).limit(1)
+        )).first()
+        if has_coverage:
             logging.error(f"Cannot delete beneficiary with associated coverages: {beneficiary_id}")
             raise ValueError("Cannot delete beneficiary with associated coverages.")
 
-        self.repository.delete(db_beneficiary=db_beneficiary)
+        await self.repository.delete(db_beneficiary=db_beneficiary)
         return True
+
+    async def search_beneficiaries(self, q: str, limit: int = 10) -> List[dict]:
+        logging.info(f"Searching beneficiaries: {q!r}, {limit}")
+        try:
+            return await self.repository.search(
+                q=q,
+                limit=limit,
+                similarity_threshold=settings.BENEFICIARY_SEARCH_SIMILARITY_THRESHOLD,
+                timeout_ms=settings.BENEFICIARY_SEARCH_TIMEOUT_MS,
+            )
+        except DBAPIError as e:
+            if not isinstance(e.orig.__cause__, QueryCanceledError):
+                raise
+            await self.session.rollback()
+            logging.error(f"Beneficiary search exceeded {settings.BENEFICIARY_SEARCH_TIMEOUT_MS} ms: {q!r}")
+            raise TimeoutError(f"Search exceeded its {settings.BENEFICIARY_SEARCH_TIMEOUT_MS} ms latency budget")
+
+    async def stream_export(self, filters: Optional[BeneficiaryFilters] = None) -> AsyncIterator[dict]:
+        logging.info(f"Streaming beneficiary export: {filters}")
+        async for row in self.repository.stream_export(filters=filters):
+            yield row
+
+    async def bulk_create_beneficiaries(
+        self, rows: List[Dict[str, Any]], row_numbers: Optional[List[int]] = None
+    ) -> dict:
+        # row_numbers permite reportar la fila del archivo de origen en vez de la posición en `rows`
+        logging.info(f"Bulk creating beneficiaries: {len(rows)} rows")
+        if len(rows) > settings.DB_BULK_MAX_ROWS:
+            raise ValueError(f"A bulk request accepts at most {settings.DB_BULK_MAX_ROWS} beneficiaries, got {len(rows)}")
+
+        results: List[Optional[dict]] = [None] * len(rows)
+
+        # 1. Validación de esquema
+        validated = []
+        for index, row in enumerate(rows):
+            try:
+                validated.append((index, BeneficiaryCreate.model_validate(row)))
+            except ValidationError as e:
+                results[index] = {"index": index, "number_document": row.get("number_document"), "status": "invalid", "detail": str(e)}
+
+        # 2. Llaves paramétricas contra la base (una consulta por tabla), no
+        # contra el cache: un id creado en otro worker aún no está en su cache
+        parametric_ids = {}
+        for field, model, _ in PARAMETRIC_FIELDS:
+            ids = {getattr(beneficiary_in, field) for _, beneficiary_in in validated} - {None}
+            parametric_ids[field] = await self.repository.get_existing_ids(model=model, ids=list(ids)) if ids else set()
+
+        # 3. Deduplicación dentro de la petición, en una sola pasada
+        candidates: Dict[str, tuple] = {}
+        for index, beneficiary_in in validated:
+            number_document = beneficiary_in.number_document
+            missing = [
+                field for field, _, nullable in PARAMETRIC_FIELDS
+                if not (getattr(beneficiary_in, field) is None and nullable)
+                and getattr(beneficiary_in, field) not in parametric_ids[field]
+            ]
+            if missing:
+                results[index] = {"index": index, "number_document": number_document, "status": "invalid", "detail": f"Unknown {', '.join(missing)}"}
+            elif number_document in candidates:
+                first_row = candidates[number_document][0]
+                results[index] = {"index": index, "number_document": number_document, "status": "duplicate", "detail": f"Document number repeated in request (row {first_row if row_numbers is None else row_numbers[first_row]})"}
+            else:
+                candidates[number_document] = (index, Beneficiary.model_validate(beneficiary_in))
+
+        # 4. Deduplicación contra la base con una sola consulta
+        existing = await self.repository.get_existing_documents(number_documents=list(candidates))
+        to_insert = []
+        for number_document, (index, beneficiary) in candidates.items():
+            if number_document in existing:
+                results[index] = {"index": index, "number_document": number_document, "status": "duplicate", "detail": f"A beneficiary with document number {number_document} already exists."}
+            else:
+                to_insert.append((index, beneficiary))
+
+        # 5. Carga por lotes con COPY; un commit por lote
+        batch_size = max(settings.DB_BULK_BATCH_SIZE, 1)
+        for start in range(0, len(to_insert), batch_size):
+            batch = to_insert[start:start + batch_size]
+            try:
+                async with self.session.begin_nested():
+                    await self.repository.copy_batch(beneficiaries=[beneficiary for _, beneficiary in batch])
+                for index, beneficiary in batch:
+                    results[index] = {"index": index, "number_document": beneficiary.number_document, "status": "created", "id": beneficiary.id}
+            except (PostgresError, DBAPIError) as e:
+                # Duplicado concurrente o dato que la base rechaza: el lote se
+                # reintenta fila por fila para reportar el error de cada una
+                logging.error(f"COPY of beneficiary batch starting at row {batch[0][0]} failed, retrying row by row: {e}")
+                await self._insert_rows(batch, results)
+            await self.session.commit()
+
+        if row_numbers is not None:
+            for result in results:
+                result["index"] = row_numbers[result["index"]]
+
+        created = sum(1 for result in results if result["status"] == "created")
+        logging.info(f"Bulk created {created} of {len(rows)} beneficiaries")
+        return {"created": created, "failed": len(rows) - created, "results": results}
+
+    async def _insert_rows(self, batch: List[tuple], results: List[Optional[dict]]) -> None:
+        for index, beneficiary in batch:
+            result = {"index": index, "number_document": beneficiary.number_document}
+            try:
+                async with self.session.begin_nested():
+                    inserted = await self.repository.insert_ignoring_duplicate(beneficiary=beneficiary)
+            except DBAPIError as e:
+                result.update(status="invalid", detail=str(e.orig))
+            else:
+                if inserted:
+                    result.update(status="created", id=beneficiary.id)
+                else:
+                    result.update(status="duplicate", detail=f"A beneficiary with document number {beneficiary.number_document} already exists.")
+            results[index] = result
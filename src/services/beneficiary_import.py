@@ -0,0 +1,219 @@
+import asyncio
+import contextlib
+import csv
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import UploadFile
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from core.import_jobs import ImportJob, import_jobs
+from core.parametric_cache import PARAMETRIC_FIELDS, normalize_name, parametric_cache
+from database import async_engine
+from schemas.beneficiary import BeneficiaryCreate
+from services.beneficiary import BeneficiaryService
+from utils import IMPORT_JOBS, IMPORT_ROWS, IMPORT_ROWS_PER_SECOND, REQUEST_QUERY_STATS
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx")
+
+# Columnas con el nombre del paramétrico en vez del id: "document_type" -> "document_type_id"
+NAME_COLUMNS = {field[:-len("_id")]: field for field, _, _ in PARAMETRIC_FIELDS}
+STRING_FIELDS = {name for name, info in BeneficiaryCreate.model_fields.items() if info.annotation in (str, Optional[str])}
+BOOLEAN_FIELDS = {name for name, info in BeneficiaryCreate.model_fields.items() if info.annotation in (bool, Optional[bool])}
+TRUE_VALUES = {"si", "s", "x", "true", "1", "yes"}
+
+Row = Tuple[int, Dict[str, Any]]
+
+
+def _normalize_header(header: Any) -> str:
+    # "Tipo Documento" / "tipo-documento" -> "tipo_documento"
+    return normalize_name(header if header is not None else "").replace(" ", "_").replace("-", "_")
+
+
+def _detect_encoding(path: str) -> str:
+    with open(path, "rb") as f:
+        sample = f.read(64 * 1024)
+    try:
+        sample.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        # Un carácter multibyte cortado al final de la muestra no descarta UTF-8;
+        # cualquier otro error indica un export en Latin-1 (común en SIMAT)
+        if e.start < len(sample) - 3:
+            return "latin-1"
+    return "utf-8-sig"
+
+
+def _iter_csv(path: str) -> Iterator[Row]:
+    with open(path, newline="", encoding=_detect_encoding(path)) as f:
+        try:
+            dialect = csv.Sniffer().sniff(f.read(64 * 1024), delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        f.seek(0)
+        reader = csv.reader(f, dialect)
+        header = [_normalize_header(value) for value in next(reader, [])]
+        for row_number, values in enumerate(reader, start=2):
+            if any(value.strip() for value in values):
+                yield row_number, dict(zip(header, values))
+
+
+def _iter_xlsx(path: str) -> Iterator[Row]:
+    # Import diferido: openpyxl es pesado y solo se usa al importar hojas de cálculo
+    from openpyxl import load_workbook
+
+    # read_only recorre la hoja en streaming sin cargarla completa en memoria
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(value) for value in next(rows, ())]
+        for row_number, values in enumerate(rows, start=2):
+            if any(value is not None and str(value).strip() for value in values):
+                yield row_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def _take(rows: Iterator[Row], size: int) -> List[Row]:
+    return list(islice(rows, size))
+
+
+def _clean(field: str, value: Any) -> Any:
+    if isinstance(value, str):
+        value = value.strip()
+        if value == "":
+            return None
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, float) and value.is_integer():
+        # Excel guarda documentos y códigos como números: 1001234567.0
+        value = int(value)
+    if field in STRING_FIELDS:
+        return str(value)
+    if field in BOOLEAN_FIELDS and isinstance(value, str):
+        return normalize_name(value) in TRUE_VALUES
+    return value
+
+
+def _prepare_row(raw: Dict[str, Any], lookups: Dict[str, Dict[str, int]]) -> Tuple[Dict[str, Any], Optional[str]]:
+    row = {
+        field: _clean(field, value)
+        for field, value in raw.items()
+        if field in BeneficiaryCreate.model_fields
+    }
+
+    for name_column, field in NAME_COLUMNS.items():
+        name = raw.get(name_column)
+        if row.get(field) is not None or name is None or str(name).strip() == "":
+            continue
+        resolved = lookups[field].get(normalize_name(name))
+        if resolved is None:
+            return row, f"Unknown {name_column} '{name}'"
+        row[field] = resolved
+
+    return row, None
+
+
+async def _save_upload(file: UploadFile, suffix: str) -> str:
+    # Se copia por bloques a disco: la petición no mantiene el archivo en memoria
+    # y el trabajo puede leerlo después de que FastAPI cierre el UploadFile
+    fd, path = tempfile.mkstemp(prefix="beneficiary-import-", suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            f.write(chunk)
+    return path
+
+
+async def start_beneficiary_import(file: UploadFile) -> ImportJob:
+    filename = file.filename or ""
+    suffix = os.path.splitext(filename)[1].lower()
+    if suffix not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Unsupported file type '{suffix or filename}'. Supported: {', '.join(SUPPORTED_EXTENSIONS)}")
+
+    path = await _save_upload(file, suffix)
+    job = import_jobs.create(filename)
+    import_jobs.start(job, run_beneficiary_import(job, path, suffix))
+    logging.info(f"Started beneficiary import job {job.id} for {filename}")
+    return job
+
+
+async def run_beneficiary_import(job: ImportJob, path: str, suffix: str) -> None:
+    # La tarea hereda el contexto de la petición que subió el archivo: sus
+    # sentencias no deben sumarse a las estadísticas de esa petición
+    REQUEST_QUERY_STATS.set(None)
+
+    job.status = "running"
+    job.started_at = time.monotonic()
+    rows = _iter_xlsx(path) if suffix == ".xlsx" else _iter_csv(path)
+    try:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            service = BeneficiaryService(session)
+            while True:
+                # El parseo (sobre todo XLSX) es CPU/IO bloqueante: va en un hilo
+                chunk = await asyncio.to_thread(_take, rows, settings.IMPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                await _import_chunk(job, service, chunk)
+        job.status = "completed"
+    except asyncio.CancelledError:
+        job.status = "failed"
+        job.detail = "Import cancelled"
+        raise
+    except Exception as e:
+        logging.error(f"Beneficiary import job {job.id} failed: {e}")
+        job.status = "failed"
+        job.detail = str(e)
+    finally:
+        # Si se cancela mientras _take sigue leyendo en su hilo, el generador está en
+        # ejecución y close() falla; el archivo se cierra cuando ese hilo termine
+        with contextlib.suppress(ValueError):
+            await asyncio.to_thread(rows.close)
+        os.remove(path)
+        job.finished_at = time.monotonic()
+        IMPORT_JOBS.labels(status=job.status).inc()
+        IMPORT_ROWS_PER_SECOND.observe(job.rows_per_second)
+        logging.info(f"Beneficiary import job {job.id} {job.status}: {job.to_dict(include_errors=False)}")
+
+
+async def _import_chunk(job: ImportJob, service: BeneficiaryService, chunk: List[Row]) -> None:
+    lookups = await parametric_cache.get(service.session)
+
+    rows, row_numbers = [], []
+    for row_number, raw in chunk:
+        row, error = _prepare_row(raw, lookups)
+        if error:
+            job.invalid += 1
+            job.add_error({"row": row_number, "number_document": row.get("number_document"), "status": "invalid", "detail": error})
+            IMPORT_ROWS.labels(outcome="invalid").inc()
+        else:
+            rows.append(row)
+            row_numbers.append(row_number)
+
+    if rows:
+        result = await service.bulk_create_beneficiaries(rows, row_numbers=row_numbers)
+        for row_result in result["results"]:
+            status = row_result["status"]
+            IMPORT_ROWS.labels(outcome=status).inc()
+            if status == "created":
+                job.created += 1
+                continue
+            if status == "duplicate":
+                job.duplicates += 1
+            else:
+                job.invalid += 1
+            job.add_error({
+                "row": row_result["index"],
+                "number_document": row_result["number_document"],
+                "status": status,
+                "detail": row_result["detail"],
+            })
+
+    job.rows_processed += len(chunk)
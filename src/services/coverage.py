@@ -1,81 +1,125 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from uuid import UUID
-from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from core.config import settings
+from core.db_errors import violated_constraint
+from core.fieldsets import Fieldset
+from core.pagination import decode_cursor
 from models.coverage import Coverage
-from repositories.coverage import CoverageRepository
+from repositories.coverage import DUPLICATE_COVERAGE_MESSAGE, CoverageRepository
 from schemas.coverage import CoverageCreate, CoverageUpdate
 import logging
 
+# Bits de GROUPING(departamento, municipio, institución, sede) -> nivel de la fila
+ROLLUP_LEVELS = {
+    0b0000: "campus",
+    0b0001: "institution",
+    0b0011: "town",
+    0b0111: "department",
+    0b1111: "national",
+}
+
 class CoverageService:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
         self.repository = CoverageRepository(session)
 
-    def create_coverage(self, coverage_in: CoverageCreate) -> Coverage:
+    async def create_coverage(self, coverage_in: CoverageCreate) -> Coverage:
         logging.info(f"Creating coverage: {coverage_in}")
-        # Check for uniqueness: A beneficiary should not have the same benefit type twice for the same campus.
-        existing_coverage = self.session.exec(
-            select(Coverage)
-            .where(Coverage.beneficiary_id == coverage_in.beneficiary_id)
-            .where(Coverage.benefit_type_id == coverage_in.benefit_type_id)
-            .where(Coverage.campus_id == coverage_in.campus_id)
-        ).first()
-
-        if existing_coverage:
+        coverage = await self.repository.create(coverage_in=coverage_in)
+        if coverage is None:
             logging.error(f"Coverage with beneficiary {coverage_in.beneficiary_id}, benefit type {coverage_in.benefit_type_id}, and campus {coverage_in.campus_id} already exists.")
-            raise ValueError("This coverage (beneficiary, benefit type, campus) already exists.")
+            raise ValueError(DUPLICATE_COVERAGE_MESSAGE)
 
-        return self.repository.create(coverage_in=coverage_in)
+        return coverage
 
-    def get_coverage(self, coverage_id: UUID) -> Optional[Coverage]:
-        logging.info(f"Getting coverage: {coverage_id}")
-        return self.repository.get_by_id(coverage_id=coverage_id)
+    async def bulk_upsert_coverages(self, coverages_in: List[CoverageCreate]) -> dict:
+        logging.info(f"Bulk upserting coverages: {len(coverages_in)} rows")
+        if len(coverages_in) > settings.DB_BULK_MAX_ROWS:
+            raise ValueError(f"A bulk request accepts at most {settings.DB_BULK_MAX_ROWS} coverages, got {len(coverages_in)}")
 
-    def get_all_coverages(self, skip: int = 0, limit: int = 100) -> List[Coverage]:
-        logging.info(f"Getting all coverages: {skip}, {limit}")
-        return self.repository.get_all(skip=skip, limit=limit)
+        # Una misma sentencia ON CONFLICT no puede tocar dos veces la misma fila:
+        # se deduplica por (beneficiary, benefit type, campus) y gana la última.
+        # El orden fijo evita deadlocks entre cargas concurrentes
+        unique = {
+            (coverage_in.beneficiary_id, coverage_in.benefit_type_id, coverage_in.campus_id): coverage_in
+            for coverage_in in coverages_in
+        }
+        coverages = [Coverage.model_validate(unique[key]) for key in sorted(unique, key=lambda key: (str(key[0]), key[1], key[2]))]
 
-    def update_coverage(
-        self, coverage_id: UUID, coverage_in: CoverageUpdate
-    ) -> Coverage:
-        logging.info(f"Updating coverage: {coverage_id}")
-        db_coverage = self.session.get(Coverage, coverage_id)
-        if not db_coverage:
-            raise ValueError(f"Coverage with id {coverage_id} not found")
+        inserted = updated = 0
+        batch_size = max(settings.DB_BULK_BATCH_SIZE, 1)
+        try:
+            for start in range(0, len(coverages), batch_size):
+                batch_inserted, batch_updated = await self.repository.upsert_batch(
+                    coverages=coverages[start:start + batch_size]
+                )
+                inserted += batch_inserted
+                updated += batch_updated
+            # Un solo commit: el roster se aplica completo o no se aplica
+            await self.session.commit()
+        except IntegrityError as e:
+            await self.session.rollback()
+            logging.error(f"Error bulk upserting coverages: {e}")
+            raise ValueError(f"Bulk coverage upsert violates {violated_constraint(e) or 'a database constraint'}; no coverage was applied")
 
-        # Check for uniqueness on update if relevant fields are changed
-        if (
-            coverage_in.beneficiary_id is not None or
-            coverage_in.benefit_type_id is not None or
-            coverage_in.campus_id is not None
-        ):
-            beneficiary_id = coverage_in.beneficiary_id or db_coverage.beneficiary_id
-            benefit_type_id = coverage_in.benefit_type_id or db_coverage.benefit_type_id
-            campus_id = coverage_in.campus_id or db_coverage.campus_id
+        # Las repeticiones dentro de la petición se fusionaron: no son filas sin cambios
+        unchanged = len(coverages) - inserted - updated
+        duplicates = len(coverages_in) - len(coverages)
+        logging.info(f"Bulk upserted coverages: {inserted} inserted, {updated} updated, {unchanged} unchanged, {duplicates} duplicates")
+        return {"inserted": inserted, "updated": updated, "unchanged": unchanged, "duplicates": duplicates}
 
-            existing_coverage = self.session.exec(
-                select(Coverage)
-                .where(Coverage.beneficiary_id == beneficiary_id)
-                .where(Coverage.benefit_type_id == benefit_type_id)
-                .where(Coverage.campus_id == campus_id)
-                .where(Coverage.id != coverage_id)
-            ).first()
+    async def get_coverage(self, coverage_id: UUID, fieldset: Optional[Fieldset] = None) -> Optional[Coverage]:
+        logging.info(f"Getting coverage: {coverage_id}")
+        return await self.repository.get_by_id(coverage_id=coverage_id, fieldset=fieldset)
 
-            if existing_coverage:
-                logging.error(f"Coverage with beneficiary {beneficiary_id}, benefit type {benefit_type_id}, and campus {campus_id} already exists.")
-                raise ValueError("This coverage (beneficiary, benefit type, campus) already exists.")
+    async def get_all_coverages(
+        self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fieldset: Optional[Fieldset] = None
+    ) -> List[Coverage]:
+        logging.info(f"Getting all coverages: {skip}, {limit}, {cursor}")
+        after = decode_cursor(cursor) if cursor else None
+        return await self.repository.get_all(skip=skip, limit=limit, after=after, fieldset=fieldset)
 
-        return self.repository.update(
-            db_coverage=db_coverage, coverage_in=coverage_in
+    async def update_coverage(
+        self, coverage_id: UUID, coverage_in: CoverageUpdate
+    ) -> Coverage:
+        logging.info(f"Updating coverage: {coverage_id}")
+        # La unicidad (beneficiary, benefit type, campus) la valida el índice único
+        # y la existencia, la fila devuelta por el UPDATE ... RETURNING
+        coverage = await self.repository.update(
+            coverage_id=coverage_id, coverage_in=coverage_in
         )
+        if coverage is None:
+            raise ValueError(f"Coverage with id {coverage_id} not found")
+        return coverage
 
-    def delete_coverage(self, coverage_id: UUID):
+    async def delete_coverage(self, coverage_id: UUID):
         logging.info(f"Deleting coverage: {coverage_id}")
-        db_coverage = self.session.get(Coverage, coverage_id)
+        db_coverage = await self.session.get(Coverage, coverage_id)
         if not db_coverage:
             logging.error(f"Coverage with id {coverage_id} not found")
             raise ValueError(f"Coverage with id {coverage_id} not found")
 
-        self.repository.delete(db_coverage=db_coverage)
+        await self.repository.delete(db_coverage=db_coverage)
         return True
+
+    async def stream_rollup(
+        self,
+        *,
+        department_id: Optional[int] = None,
+        town_id: Optional[int] = None,
+        institution_id: Optional[int] = None,
+        campus_id: Optional[int] = None,
+    ) -> AsyncIterator[dict]:
+        logging.info(f"Streaming coverage rollup: {department_id}, {town_id}, {institution_id}, {campus_id}")
+        rows = self.repository.stream_rollup(
+            department_id=department_id,
+            town_id=town_id,
+            institution_id=institution_id,
+            campus_id=campus_id,
+        )
+        async for row in rows:
+            row["level"] = ROLLUP_LEVELS[row.pop("grouping")]
+            yield row
@@ -1,6 +1,11 @@
 
+import logging
+import re
 import time
-from typing import Tuple
+from collections import Counter as StatementCounter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
 
 from opentelemetry import trace
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import \
@@ -49,6 +54,114 @@ REQUESTS_IN_PROGRESS = Gauge(
     "Gauge of requests by method and path currently being processed",
     ["method", "path", "app_name"],
 )
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured number of persistent connections in the SQLAlchemy pool.",
+    ["pool"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Gauge of database connections currently checked out of the pool.",
+    ["pool"],
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Gauge of overflow connections currently open beyond the pool size (negative while the pool is filling).",
+    ["pool"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Histogram of time spent waiting for a connection from the pool (in seconds).",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Total count of pool checkouts that timed out waiting for a connection.",
+    ["pool"],
+)
+DB_SESSION_ROUTING = Counter(
+    "db_session_routing_total",
+    "Total count of request sessions by target database (primary, replica, replica_fallback).",
+    ["target"],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Histogram of SQL statements executed per request by path.",
+    ["method", "path", "app_name"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Histogram of time spent executing SQL per request by path (in seconds).",
+    ["method", "path", "app_name"],
+)
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries_total",
+    "Total count of SQL statements slower than the slow-query threshold, by path.",
+    ["path"],
+)
+DB_QUERY_WARNINGS = Counter(
+    "db_query_warnings_total",
+    "Total count of requests over the statement budget or with repeated statements (N+1), by kind.",
+    ["method", "path", "kind", "app_name"],
+)
+AUTH_CACHE_HITS = Counter(
+    "auth_cache_hits_total",
+    "Total count of authorization decisions served from the in-process cache.",
+    ["permission"],
+)
+AUTH_CACHE_MISSES = Counter(
+    "auth_cache_misses_total",
+    "Total count of authorization decisions not found in the in-process cache.",
+    ["permission"],
+)
+AUTH_CACHE_EVICTIONS = Counter(
+    "auth_cache_evictions_total",
+    "Total count of authorization cache evictions by reason.",
+    ["reason"],
+)
+AUTH_SINGLE_FLIGHT_CALLS = Counter(
+    "auth_single_flight_calls_total",
+    "Total count of authorization checks actually sent to the auth service.",
+)
+AUTH_SINGLE_FLIGHT_COALESCED = Counter(
+    "auth_single_flight_coalesced_total",
+    "Total count of authorization checks collapsed into an identical in-flight call.",
+)
+AUTH_CIRCUIT_STATE = Gauge(
+    "auth_circuit_state",
+    "State of the circuit breaker around the auth service (0=closed, 1=open, 2=half-open).",
+    ["circuit"],
+)
+AUTH_CIRCUIT_REJECTIONS = Counter(
+    "auth_circuit_rejections_total",
+    "Total count of authorization checks short-circuited by an open breaker, by outcome.",
+    ["outcome"],
+)
+AUTH_HTTP_POOL_CONNECTIONS_IN_USE = Gauge(
+    "auth_http_pool_connections_in_use",
+    "Gauge of connections to the auth service currently serving a request.",
+)
+AUTH_HTTP_POOL_CONNECTIONS_IDLE = Gauge(
+    "auth_http_pool_connections_idle",
+    "Gauge of keep-alive connections to the auth service currently idle in the pool.",
+)
+IMPORT_JOBS = Counter(
+    "import_jobs_total",
+    "Total count of finished file import jobs by final status.",
+    ["status"],
+)
+IMPORT_ROWS = Counter(
+    "import_rows_total",
+    "Total count of imported file rows by outcome (created, duplicate, invalid).",
+    ["outcome"],
+)
+IMPORT_ROWS_PER_SECOND = Histogram(
+    "import_rows_per_second",
+    "Histogram of throughput (rows per second) of finished file import jobs.",
+    buckets=(100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000),
+)
 
 
 class PrometheusMiddleware(BaseHTTPMiddleware):
@@ -104,6 +217,86 @@ class PrometheusMiddleware(BaseHTTPMiddleware):
         return request.url.path, False
 
 
+@dataclass
+class RequestQueryStats:
+    method: str = ""
+    path: str = ""
+    count: int = 0
+    duration: float = 0.0
+    statements: StatementCounter = field(default_factory=StatementCounter)
+
+
+# Estadísticas de SQL de la petición en curso (None fuera de una petición)
+REQUEST_QUERY_STATS: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def record_query(statement: str, duration: float) -> None:
+    stats = REQUEST_QUERY_STATS.get()
+    if stats is None:
+        return
+    stats.count += 1
+    stats.duration += duration
+    # Las sentencias ya vienen parametrizadas: el texto es la "forma" de la consulta
+    stats.statements[_WHITESPACE.sub(" ", statement).strip()] += 1
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """
+    Cuenta las sentencias SQL y el tiempo en base de datos de cada petición,
+    avisa cuando se supera el presupuesto de sentencias o una misma sentencia se
+    repite (patrón N+1) y agrega el header `Server-Timing`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        app_name: str = "fastapi-app",
+        statement_budget: int = 20,
+        repeat_threshold: int = 5,
+        server_timing: bool = True,
+    ) -> None:
+        super().__init__(app)
+        self.app_name = app_name
+        self.statement_budget = statement_budget
+        self.repeat_threshold = repeat_threshold
+        self.server_timing = server_timing
+        self.logger = logging.getLogger(__name__)
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        path, is_handled_path = PrometheusMiddleware.get_path(request)
+        if not is_handled_path:
+            return await call_next(request)
+
+        stats = RequestQueryStats(method=request.method, path=path)
+        token = REQUEST_QUERY_STATS.set(stats)
+        try:
+            response = await call_next(request)
+        finally:
+            REQUEST_QUERY_STATS.reset(token)
+
+        method = request.method
+        DB_QUERIES_PER_REQUEST.labels(method=method, path=path, app_name=self.app_name).observe(stats.count)
+        DB_TIME_PER_REQUEST.labels(method=method, path=path, app_name=self.app_name).observe(stats.duration)
+
+        if stats.count > self.statement_budget:
+            DB_QUERY_WARNINGS.labels(method=method, path=path, kind="budget", app_name=self.app_name).inc()
+            self.logger.warning(f"{method} {path} executed {stats.count} SQL statements (budget {self.statement_budget})")
+
+        if stats.statements:
+            statement, repeats = stats.statements.most_common(1)[0]
+            if repeats >= self.repeat_threshold:
+                DB_QUERY_WARNINGS.labels(method=method, path=path, kind="repeated", app_name=self.app_name).inc()
+                self.logger.warning(f"{method} {path} repeated the same SQL statement {repeats} times (possible N+1): {statement[:200]}")
+
+        if self.server_timing:
+            response.headers.append(
+                "Server-Timing", f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+            )
+        return response
+
+
 def metrics(request: Request) -> Response:
     return Response(generate_latest(REGISTRY), headers={"Content-Type": CONTENT_TYPE_LATEST})
 
@@ -0,0 +1,67 @@
+import os
+from dataclasses import dataclass, field
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Base de pruebas ya migrada (`alembic upgrade head`), p. ej.
+# postgresql+asyncpg://postgres@127.0.0.1:5432/pae_test
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@dataclass
+class StatementCounter:
+    """Sentencias SQL emitidas por la sesión, sin contar los SAVEPOINT del fixture."""
+    statements: list = field(default_factory=list)
+    parameters: list = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self) -> None:
+        self.statements.clear()
+        self.parameters.clear()
+
+
+@pytest.fixture
+async def connection():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL no está configurada")
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            # Transacción externa que se revierte: cada prueba deja la base intacta
+            transaction = await conn.begin()
+            try:
+                yield conn
+            finally:
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture
+async def session(connection):
+    # Los commit de los repositorios liberan un SAVEPOINT, no la transacción externa
+    async with AsyncSession(
+        bind=connection, expire_on_commit=False, join_transaction_mode="create_savepoint"
+    ) as session:
+        yield session
+
+
+@pytest.fixture
+def statement_counter(connection):
+    counter = StatementCounter()
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")):
+            counter.statements.append(statement)
+            counter.parameters.append(parameters)
+
+    event.listen(connection.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    yield counter
+    event.remove(connection.sync_engine, "before_cursor_execute", _before_cursor_execute)
@@ -0,0 +1,124 @@
+import json
+
+import pytest
+from sqlalchemy import text
+
+from repositories.beneficiary import BeneficiaryRepository
+from schemas.beneficiary import BeneficiaryFilters
+
+ROWS = 20000
+PAGE = 100
+
+
+@pytest.fixture
+async def parametrics(connection):
+    """Un id de cada tabla paramétrica (varios grados para que el filtro sea selectivo)."""
+    ids = {}
+    for table, count in [("document_type", 1), ("gender", 2), ("grade", 20), ("etnic_group", 4), ("disability_type", 2)]:
+        result = await connection.execute(
+            text(f"INSERT INTO {table} (name) SELECT 'test-' || md5(random()::text) FROM generate_series(1, :count) RETURNING id"),
+            {"count": count},
+        )
+        ids[table] = [row.id for row in result]
+    return ids
+
+
+@pytest.fixture
+async def beneficiaries(connection, parametrics):
+    """
+    ROWS beneficiarios con distribuciones parecidas a las reales: 5 % por grado,
+    20 % con grupo étnico, 2 % con discapacidad, 5 % víctimas y 3 % retirados.
+    """
+    await connection.execute(
+        text("""
+            INSERT INTO beneficiary (
+                id, document_type_id, number_document, first_name, first_surname, birth_date,
+                gender_id, grade_id, etnic_group_id, victim_conflict, disability_type_id,
+                retirement_date, created_at, updated_at
+            )
+            SELECT
+                gen_random_uuid(), :document_type, 'test-' || n, 'Nombre', 'Apellido', DATE '2015-01-01' + (n % 2000),
+                (CAST(:genders AS integer[]))[1 + n % 2], (CAST(:grades AS integer[]))[1 + n % 20],
+                CASE WHEN n % 5 = 0 THEN (CAST(:etnic_groups AS integer[]))[1 + n / 5 % 4] END,
+                n % 20 = 0,
+                CASE WHEN n % 50 = 0 THEN (CAST(:disability_types AS integer[]))[1 + n / 50 % 2] END,
+                CASE WHEN n % 33 = 0 THEN DATE '2024-06-30' END,
+                TIMESTAMP '2024-01-01' + n * INTERVAL '1 minute', now()
+            FROM generate_series(1, :rows) AS n
+        """),
+        {
+            "document_type": parametrics["document_type"][0],
+            "genders": parametrics["gender"],
+            "grades": parametrics["grade"],
+            "etnic_groups": parametrics["etnic_group"],
+            "disability_types": parametrics["disability_type"],
+            "rows": ROWS,
+        },
+    )
+    # Estadísticas al día para que el planner estime como en producción
+    await connection.execute(text("ANALYZE beneficiary"))
+    return parametrics
+
+
+def _indexes(plan: dict) -> set:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= _indexes(child)
+    return names
+
+
+def _node_types(plan: dict) -> set:
+    types = {plan["Node Type"]}
+    for child in plan.get("Plans", []):
+        types |= _node_types(child)
+    return types
+
+
+async def _plan(connection, session, statement_counter, filters: BeneficiaryFilters, after=None) -> dict:
+    """Plan de la sentencia que emite `get_all` para `filters`."""
+    statement_counter.reset()
+    rows = await BeneficiaryRepository(session).get_all(limit=PAGE, filters=filters, after=after)
+    assert statement_counter.count == 1
+    explain = await connection.exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + statement_counter.statements[0], statement_counter.parameters[0]
+    )
+    plan = explain.scalar()
+    return rows, (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+
+def _cases(ids: dict):
+    return [
+        (BeneficiaryFilters(grade_id=ids["grade"][3]), "ix_beneficiary_grade_id_created_at_id"),
+        (BeneficiaryFilters(etnic_group_id=ids["etnic_group"][1]), "ix_beneficiary_etnic_group_id_created_at_id"),
+        (BeneficiaryFilters(disability_type_id=ids["disability_type"][0]), "ix_beneficiary_disability_type_id_created_at_id"),
+        (BeneficiaryFilters(victim_conflict=True), "ix_beneficiary_victim_conflict_created_at_id"),
+        (BeneficiaryFilters(retired=True), "ix_beneficiary_retired_created_at_id"),
+        # El 95 % no es víctima: el índice parcial no aplica y el recorrido en
+        # orden del índice keyset encuentra la página tras leer ~PAGE filas
+        (BeneficiaryFilters(victim_conflict=False), "ix_beneficiary_created_at_id"),
+    ]
+
+
+@pytest.mark.parametrize("case", range(6))
+async def test_filter_uses_keyset_index(connection, session, statement_counter, beneficiaries, case):
+    filters, index = _cases(beneficiaries)[case]
+
+    rows, plan = await _plan(connection, session, statement_counter, filters)
+
+    assert len(rows) == PAGE
+    assert index in _indexes(plan)
+    # El índice entrega el orden (created_at, id): no hay Sort ni Seq Scan
+    assert not {"Sort", "Seq Scan"} & _node_types(plan)
+
+
+@pytest.mark.parametrize("case", range(6))
+async def test_filter_next_page_uses_keyset_index(connection, session, statement_counter, beneficiaries, case):
+    filters, index = _cases(beneficiaries)[case]
+    first_page, _ = await _plan(connection, session, statement_counter, filters)
+    last = first_page[-1]
+
+    rows, plan = await _plan(connection, session, statement_counter, filters, after=(last.created_at, last.id))
+
+    assert rows and rows[0].created_at > last.created_at
+    assert index in _indexes(plan)
+    assert not {"Sort", "Seq Scan"} & _node_types(plan)
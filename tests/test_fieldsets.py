@@ -0,0 +1,74 @@
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from core.fieldsets import Fieldset, fieldset
+from models.benefit_type import BenefitType
+from models.campus import Campus
+from schemas.coverage import COVERAGE_EXPANSIONS, COVERAGE_FIELDS, CoverageFieldsRead
+
+
+def _coverage():
+    now = datetime(2024, 1, 1)
+    campus = Campus(
+        id=7, name="Sede", dane_code="123", address="Calle 1", latitude=4.6, longitude=-74.1,
+        institution_id=3, created_at=now, updated_at=now, number_of_coverages=42,
+    )
+    return SimpleNamespace(
+        id=uuid.uuid4(), active=True, benefit_type_id=1, campus_id=7, beneficiary_id=uuid.uuid4(),
+        created_at=now, updated_at=now, deleted_at=None,
+        benefit_type=BenefitType(id=1, name="Almuerzo"), campus=campus, beneficiary=None,
+    )
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    item = _coverage()
+
+    @app.get("/coverages", response_model=List[CoverageFieldsRead], response_model_exclude_unset=True)
+    def coverages(fields: Fieldset = Depends(fieldset(COVERAGE_FIELDS, COVERAGE_EXPANSIONS))):
+        return [fields.serialize(item)]
+
+    @app.get("/coverages/detail", response_model=CoverageFieldsRead, response_model_exclude_unset=True)
+    def coverage(fields: Fieldset = Depends(fieldset(COVERAGE_FIELDS, COVERAGE_EXPANSIONS, default_expand=("benefit_type",)))):
+        return fields.serialize(item)
+
+    return TestClient(app)
+
+
+def test_default_returns_every_column_and_no_relationship(client):
+    [body] = client.get("/coverages").json()
+
+    assert set(body) == set(COVERAGE_FIELDS)
+    assert body["deleted_at"] is None
+
+
+def test_fields_limits_the_columns(client):
+    [body] = client.get("/coverages", params={"fields": "id,active"}).json()
+
+    assert set(body) == {"id", "active"}
+
+
+def test_expanded_relationship_follows_the_schema(client):
+    [body] = client.get("/coverages", params={"fields": "id", "expand": "campus"}).json()
+
+    # El contador de la tabla campus no es parte de CampusResponse
+    assert set(body) == {"id", "campus"}
+    assert body["campus"]["name"] == "Sede"
+    assert "number_of_coverages" not in body["campus"]
+
+
+def test_default_expand_and_empty_expand(client):
+    assert "benefit_type" in client.get("/coverages/detail").json()
+    assert "benefit_type" not in client.get("/coverages/detail", params={"expand": ""}).json()
+
+
+@pytest.mark.parametrize("params", [{"fields": "id,nope"}, {"expand": "nope"}])
+def test_unknown_names_are_rejected(client, params):
+    assert client.get("/coverages", params=params).status_code == 400
@@ -0,0 +1,144 @@
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from repositories.campus import CampusRepository
+from repositories.department import DepartmentRepository
+from repositories.institution import InstitutionRepository
+from repositories.town import TownRepository
+from schemas.campus import CampusCreate, CampusUpdate
+from schemas.departments import DepartmentCreate
+from schemas.institutions import InstitutionCreate
+from schemas.towns import TownCreate, TownUpdate
+
+CHILDREN = 3
+
+
+def _code() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+@pytest.fixture
+async def hierarchy(session):
+    """Un departamento con CHILDREN municipios, instituciones y sedes en cascada."""
+    department = await DepartmentRepository(session).create(
+        department_in=DepartmentCreate(name=f"test-{_code()}", dane_code=_code())
+    )
+    towns, institutions, campuses = [], [], []
+    for _ in range(CHILDREN):
+        towns.append(await TownRepository(session).create(
+            town_in=TownCreate(name=f"test-{_code()}", dane_code=_code(), department_id=department["id"])
+        ))
+    for _ in range(CHILDREN):
+        institutions.append(await InstitutionRepository(session).create(
+            institution_in=InstitutionCreate(name=f"test-{_code()}", dane_code=_code(), town_id=towns[0]["id"])
+        ))
+    for _ in range(CHILDREN):
+        campuses.append(await CampusRepository(session).create(
+            campus_in=CampusCreate(
+                name=f"test-{_code()}", dane_code=_code(), institution_id=institutions[0]["id"],
+                address="Calle 1", latitude=4.6, longitude=-74.1,
+            )
+        ))
+    # Los contadores los mantienen triggers: se descarta el mapa de identidad
+    # para leerlos como lo haría una petición nueva
+    session.expire_all()
+    return {"department": department, "towns": towns, "institutions": institutions, "campuses": campuses}
+
+
+@pytest.mark.parametrize("limit", [1, CHILDREN])
+async def test_towns_by_department_is_one_statement(session, statement_counter, hierarchy, limit):
+    statement_counter.reset()
+    towns = await TownRepository(session).get_by_department(
+        department_id=hierarchy["department"]["id"], limit=limit
+    )
+
+    assert len(towns) == limit
+    assert statement_counter.count == 1
+    counts = {town["id"]: town["number_of_institutions"] for town in towns}
+    expected = {town["id"]: (CHILDREN if town["id"] == hierarchy["towns"][0]["id"] else 0) for town in hierarchy["towns"]}
+    assert counts == {town_id: expected[town_id] for town_id in counts}
+
+
+@pytest.mark.parametrize("limit", [1, CHILDREN])
+async def test_institutions_by_town_is_one_statement(session, statement_counter, hierarchy, limit):
+    statement_counter.reset()
+    institutions = await InstitutionRepository(session).get_by_town(
+        town_id=hierarchy["towns"][0]["id"], limit=limit
+    )
+
+    assert len(institutions) == limit
+    assert statement_counter.count == 1
+    first_id = hierarchy["institutions"][0]["id"]
+    for institution in institutions:
+        assert institution["number_of_campuses"] == (CHILDREN if institution["id"] == first_id else 0)
+
+
+@pytest.mark.parametrize("limit", [1, CHILDREN])
+async def test_campuses_by_institution_is_one_statement(session, statement_counter, hierarchy, limit):
+    statement_counter.reset()
+    campuses = await CampusRepository(session).get_by_institution(
+        institution_id=hierarchy["institutions"][0]["id"], limit=limit
+    )
+
+    assert len(campuses) == limit
+    assert statement_counter.count == 1
+    assert all(campus["number_of_coverages"] == 0 for campus in campuses)
+
+
+@pytest.mark.parametrize(
+    "repository",
+    [DepartmentRepository, TownRepository, InstitutionRepository, CampusRepository],
+)
+async def test_get_all_is_one_statement(session, statement_counter, hierarchy, repository):
+    statement_counter.reset()
+    items = await repository(session).get_all(limit=50)
+
+    assert items
+    assert statement_counter.count == 1
+
+
+async def test_department_counter_follows_towns(session, hierarchy):
+    department = await DepartmentRepository(session).get_by_id(department_id=hierarchy["department"]["id"])
+
+    assert department["number_of_towns"] == CHILDREN
+
+
+async def _trigger_calls(session) -> dict:
+    rows = (await session.exec(text(
+        "SELECT funcname, calls FROM pg_stat_xact_user_functions WHERE funcname LIKE '%_maintain_parent_counter'"
+    ))).all()
+    return {name: calls for name, calls in rows}
+
+
+async def test_child_update_without_move_does_not_cascade(session, hierarchy):
+    try:
+        await session.exec(text("SET LOCAL track_functions = 'pl'"))
+    except DBAPIError:
+        pytest.skip("track_functions requiere un superusuario")
+    campus = hierarchy["campuses"][0]
+    before = await _trigger_calls(session)
+
+    await CampusRepository(session).update(campus_id=campus["id"], campus_in=CampusUpdate(name=f"test-{_code()}"))
+
+    calls = await _trigger_calls(session)
+    assert calls.get("campus_maintain_parent_counter", 0) == before.get("campus_maintain_parent_counter", 0) + 1
+    # Sin cambio de institución el trigger no actualiza al padre: no se encadena
+    assert calls.get("institution_maintain_parent_counter", 0) == before.get("institution_maintain_parent_counter", 0)
+
+
+async def test_moving_a_child_updates_both_parents(session, hierarchy):
+    town = hierarchy["towns"][0]
+    other_department = await DepartmentRepository(session).create(
+        department_in=DepartmentCreate(name=f"test-{_code()}", dane_code=_code())
+    )
+
+    await TownRepository(session).update(town_id=town["id"], town_in=TownUpdate(department_id=other_department["id"]))
+    session.expire_all()
+
+    department = await DepartmentRepository(session).get_by_id(department_id=hierarchy["department"]["id"])
+    other_department = await DepartmentRepository(session).get_by_id(department_id=other_department["id"])
+    assert department["number_of_towns"] == CHILDREN - 1
+    assert other_department["number_of_towns"] == 1
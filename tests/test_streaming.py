@@ -0,0 +1,43 @@
+import pytest
+
+from core.streaming import stream_csv, stream_json_array, stream_ndjson
+
+
+class Source:
+    """Fuente de filas que registra si el consumidor la cerró."""
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.closed = False
+
+    async def items(self):
+        try:
+            for i in range(self.rows):
+                yield {"id": i, "name": "x" * 1024}
+        finally:
+            self.closed = True
+
+
+@pytest.mark.parametrize(
+    "serializer",
+    [stream_json_array, stream_ndjson, lambda items: stream_csv(items, ["id", "name"])],
+)
+async def test_cut_stream_closes_source(serializer):
+    source = Source(rows=1000)
+    body = serializer(source.items())
+
+    # El primer chunk del arreglo JSON es "[": se pide uno más para leer filas
+    await body.__anext__()
+    await body.__anext__()
+    await body.aclose()
+
+    assert source.closed
+
+
+async def test_json_array_is_valid_json():
+    source = Source(rows=3)
+
+    body = b"".join([chunk async for chunk in stream_json_array(source.items())])
+
+    assert body.startswith(b'[{"id": 0') and body.endswith(b"}]")
+    assert source.closed